@@ -1,6 +1,7 @@
 from airflow import DAG
-from airflow.operators.python import PythonOperator
+from airflow.operators.python import PythonOperator, ShortCircuitOperator
 from datetime import datetime, timedelta
+import sys
 import subprocess
 import logging
 
@@ -13,10 +14,15 @@ default_args = {
     'retry_delay': timedelta(minutes=5),
 }
 
-def run_script(script_path):
-    """Runs a Python script and logs its output in Airflow."""
+# Pipeline package (`scripts`, stage graph included); stages run as `python3 -m scripts <stage>`
+PROJECT_DIR = '/home/harsha/customer_churn_pipeline'
+sys.path.insert(0, PROJECT_DIR)
+from scripts.pipeline_graph import STAGES, SKIP_EXIT_CODE, stage_command, stage_dependencies
+
+def run_script(stage_name):
+    """Runs a pipeline stage and logs its output in Airflow."""
     try:
-        result = subprocess.run(["python3", script_path], capture_output=True, text=True, check=True)
+        result = subprocess.run(stage_command(stage_name, python="python3"), cwd=PROJECT_DIR, capture_output=True, text=True, check=True)
         logging.info(result.stdout)  # ✅ Capture & log output
         print(result.stdout)  # ✅ Ensure Airflow UI displays output
         return result.stdout  
@@ -25,6 +31,19 @@ def run_script(script_path):
         print(e.stderr)
         raise
 
+def run_gate_script(stage_name):
+    """Runs a gate stage; returns False (skip downstream tasks) when it exits with the skip code."""
+    result = subprocess.run(stage_command(stage_name, python="python3"), cwd=PROJECT_DIR, capture_output=True, text=True)
+    logging.info(result.stdout)
+    print(result.stdout)
+    if result.returncode == SKIP_EXIT_CODE:
+        return False
+    if result.returncode != 0:
+        logging.error(result.stderr)
+        print(result.stderr)
+        raise subprocess.CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+    return True
+
 # Define the DAG
 with DAG(
     'customer_churn_pipeline',
@@ -34,69 +53,19 @@ with DAG(
     catchup=False
 ) as dag:
 
-    # Task 1: Ingest Data
-    ingest_task = PythonOperator(
-        task_id='ingest_data',
-        python_callable=run_script,
-        op_args=['/home/harsha/customer_churn_pipeline/scripts/ingest_data.py']
-    )
-
-    # Task 2: Store Data as Parquet
-    store_parquet_task = PythonOperator(
-        task_id='store_parquet',
-        python_callable=run_script,
-        op_args=['/home/harsha/customer_churn_pipeline/scripts/store_parquet.py']
-    )
-
-    # Task 3: Validate Parquet Data
-    validate_task = PythonOperator(
-        task_id='validate_data',
-        python_callable=run_script,
-        op_args=['/home/harsha/customer_churn_pipeline/scripts/data_validation.py']
-    )
-
-    # Task 4: Prepare Data
-    prepare_data_task = PythonOperator(
-        task_id='prepare_data',
-        python_callable=run_script,
-        op_args=['/home/harsha/customer_churn_pipeline/scripts/data_preparation.py']
-    )
-
-    # Task 5: Transform Data
-    transform_data_task = PythonOperator(
-        task_id='transform_data',
-        python_callable=run_script,
-        op_args=['/home/harsha/customer_churn_pipeline/scripts/data_transform.py']
-    )
-
-    # Task 6: Feature store creation
-    feature_store_creation_task = PythonOperator(
-        task_id='feature_store_creation',
-        python_callable=run_script,
-        op_args=['/home/harsha/customer_churn_pipeline/scripts/feature_store.py']
-    )
-
-    # Task 7: Feature store retreival
-    feature_retreival_storage_task = PythonOperator(
-        task_id='feature_retreival_storage',
-        python_callable=run_script,
-        op_args=['/home/harsha/customer_churn_pipeline/scripts/feature_retreival_storage.py']
-    )
-
-    # Task 8: Data Versioning
-    data_versioning_task = PythonOperator(
-        task_id='data_versioning',
-        python_callable=run_script,
-        op_args=['/home/harsha/customer_churn_pipeline/scripts/data_versioning.py']
-    )
-
-    # Task 9: Data Modeling
-    data_modeling_task = PythonOperator(
-        task_id='data_modeling',
-        python_callable=run_script,
-        op_args=['/home/harsha/customer_churn_pipeline/scripts/data_modeling.py']
-    )
-
+    # One task per stage; gates (drift check) short-circuit their downstream tasks
+    tasks = {}
+    for stage_name, stage in STAGES.items():
+        operator = ShortCircuitOperator if stage.get('gate') else PythonOperator
+        tasks[stage_name] = operator(
+            task_id=stage_name,
+            python_callable=run_gate_script if stage.get('gate') else run_script,
+            op_args=[stage_name]
+        )
 
-    # Define Task Order (Dependency Flow)
-    ingest_task >> store_parquet_task >> validate_task >> prepare_data_task >> transform_data_task >> feature_store_creation_task >> feature_retreival_storage_task >> data_versioning_task >> data_modeling_task
+    # Define Task Order (Dependency Flow) from the stages' data inputs/outputs:
+    # validation runs alongside preparation and gates the feature-store publish,
+    # visualizations and data versioning branch off the critical path to modeling.
+    for stage_name, upstream_stages in stage_dependencies().items():
+        for upstream in upstream_stages:
+            tasks[upstream] >> tasks[stage_name]
@@ -0,0 +1,4 @@
+"""Customer churn pipeline stages. Run from the project root: `python -m scripts <stage>`.
+
+Importing the package (or the CLI) loads no third-party libraries; each stage imports its
+heavy dependencies (pandas, sklearn, mlflow, pyodbc, plotting) only when it runs."""
@@ -0,0 +1,135 @@
+import os
+import json
+import logging
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .runtime import write_json_atomic
+
+# ✅ Define Paths
+ENCODING_DIR = "models/encoding/"
+VOCABULARY_FILE = os.path.join(ENCODING_DIR, "vocabularies.json")
+
+# ✅ Encoding Settings
+SPARSE_MIN_CATEGORIES = int(os.environ.get("ENCODING_SPARSE_MIN_CATEGORIES", 64))  # One-hot width that switches to CSR
+
+class CategoricalEncoder:
+    """Label / one-hot encoding against fixed vocabularies, so every batch gets the same schema.
+
+    Values are mapped to integer codes (their index in the sorted vocabulary, -1 when unseen).
+    Label columns keep the code; one-hot columns drop the first category like
+    `get_dummies(drop_first=True)` and are written straight into one preallocated uint8 matrix
+    (returned as a bool view), or into a CSR matrix when a column has `sparse_min_categories`
+    or more categories. Unseen values encode as all zeros. Frames from `transform` are dense by
+    default, since SMOTE and Parquet do not take pandas sparse columns."""
+
+    def __init__(self, label_vocabularies, onehot_vocabularies, sparse_min_categories=SPARSE_MIN_CATEGORIES):
+        self.label_vocabularies = {col: list(vocabulary) for col, vocabulary in label_vocabularies.items()}
+        self.onehot_vocabularies = {col: list(vocabulary) for col, vocabulary in onehot_vocabularies.items()}
+        self.sparse_min_categories = sparse_min_categories
+
+    @classmethod
+    def from_stats(cls, stats, label_columns, onehot_columns):
+        """Encoder for the columns of `label_columns` / `onehot_columns` found in merged statistics."""
+        vocabularies = stats["vocabularies"]
+        return cls(
+            {col: vocabularies[col] for col in label_columns if col in vocabularies},
+            {col: vocabularies[col] for col in onehot_columns if col in vocabularies},
+        )
+
+    @property
+    def dense_columns(self):
+        return [col for col, vocabulary in self.onehot_vocabularies.items() if len(vocabulary) - 1 < self.sparse_min_categories]
+
+    @property
+    def sparse_columns(self):
+        return [col for col, vocabulary in self.onehot_vocabularies.items() if len(vocabulary) - 1 >= self.sparse_min_categories]
+
+    def onehot_names(self, columns):
+        """Output column names (`<column>_<category>`, first category dropped)."""
+        return [f"{col}_{category}" for col in columns for category in self.onehot_vocabularies[col][1:]]
+
+    @property
+    def output_columns(self):
+        """Encoded column names, in output order."""
+        return list(self.label_vocabularies) + self.onehot_names(self.dense_columns + self.sparse_columns)
+
+    def codes(self, series, col):
+        """Integer codes of a column against its vocabulary (-1 for values outside it)."""
+        vocabulary = self.label_vocabularies.get(col, self.onehot_vocabularies.get(col))
+        # Hash the column once, then map its few distinct values onto the vocabulary (same codes as
+        # `pd.Categorical(series, categories=vocabulary).codes`, without per-row category lookups)
+        batch_codes, uniques = pd.factorize(series)
+        lookup = np.append(pd.Index(vocabulary).get_indexer(uniques), -1)  # Missing (-1) stays -1
+        codes = lookup[batch_codes].astype(np.intp)
+        unseen = int(((codes == -1) & (batch_codes != -1)).sum())
+        if unseen:
+            logging.warning(f"⚠️ {unseen} values of {col} are not in the vocabulary; encoded as unknown.")
+        return codes
+
+    def _check_columns(self, df, columns):
+        missing = [col for col in columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"❌ Columns missing for encoding: {missing}")
+
+    def encode_dense(self, df, columns=None):
+        """One-hot block of `columns` (default: the dense ones) as a bool matrix, filled in place."""
+        columns = self.dense_columns if columns is None else columns
+        self._check_columns(df, columns)
+        matrix = np.zeros((len(df), len(self.onehot_names(columns))), dtype=np.uint8)
+        rows = np.arange(len(df))
+        offset = 0
+        for col in columns:
+            codes = self.codes(df[col], col)
+            hit = codes > 0  # Code 0 is the dropped first category
+            matrix[rows[hit], offset + codes[hit] - 1] = 1
+            offset += len(self.onehot_vocabularies[col]) - 1
+        return matrix.view(bool)
+
+    def encode_sparse(self, df, col):
+        """One-hot block of a high-cardinality column as a CSR matrix (at most one entry per row)."""
+        from scipy.sparse import csr_matrix
+
+        self._check_columns(df, [col])
+        codes = self.codes(df[col], col)
+        hit = codes > 0
+        indptr = np.concatenate([[0], np.cumsum(hit)])
+        shape = (len(df), len(self.onehot_vocabularies[col]) - 1)
+        return csr_matrix((np.ones(int(hit.sum()), dtype=bool), codes[hit] - 1, indptr), shape=shape)
+
+    def transform(self, df, sparse=False):
+        """Encoded frame: label columns replaced by their codes, one-hot columns replaced by their
+        indicator columns (appended at the end, like `get_dummies`). All indicators are dense bool
+        columns unless `sparse=True`, which keeps high-cardinality ones as pandas sparse columns."""
+        self._check_columns(df, list(self.label_vocabularies) + list(self.onehot_vocabularies))
+        for col in self.label_vocabularies:
+            df[col] = self.codes(df[col], col).astype("int64")
+        blocks = [df.drop(columns=list(self.onehot_vocabularies))]
+        dense_columns = self.dense_columns if sparse else self.dense_columns + self.sparse_columns
+        if dense_columns:
+            blocks.append(pd.DataFrame(self.encode_dense(df, dense_columns), columns=self.onehot_names(dense_columns), index=df.index))
+        for col in self.sparse_columns if sparse else []:
+            sparse_block = pd.DataFrame.sparse.from_spmatrix(self.encode_sparse(df, col), index=df.index, columns=self.onehot_names([col]))
+            blocks.append(sparse_block)
+        return pd.concat(blocks, axis=1) if len(blocks) > 1 else blocks[0]
+
+    def save(self, path=VOCABULARY_FILE):
+        """Persists the vocabularies."""
+        payload = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "sparse_min_categories": self.sparse_min_categories,
+            "label": self.label_vocabularies,
+            "onehot": self.onehot_vocabularies,
+        }
+        write_json_atomic(path, payload, indent=2)
+        logging.info(f"📂 Encoding vocabularies saved: {path}")
+        return path
+
+    @classmethod
+    def load(cls, path=VOCABULARY_FILE):
+        """Loads the vocabularies persisted by training."""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"❌ Encoding vocabularies not found: {path} (run data preparation for training first)")
+        with open(path) as f:
+            payload = json.load(f)
+        return cls(payload["label"], payload["onehot"], payload["sparse_min_categories"])
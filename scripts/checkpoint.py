@@ -0,0 +1,99 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from .runtime import write_json_atomic
+
+# ✅ Define Paths
+CHECKPOINT_DIR = os.environ.get("PIPELINE_CHECKPOINT_DIR", "data/checkpoints/")
+
+def file_fingerprint(*paths):
+    """Identity of input files/folders from their names, sizes and modification times (no content read)."""
+    entries = []
+    for path in paths:
+        files = [path] if os.path.isfile(path) else sorted(
+            os.path.join(root, name) for root, _, names in os.walk(path) for name in names
+        )
+        for file_path in files:
+            stat = os.stat(file_path)
+            entries.append((file_path, stat.st_size, stat.st_mtime_ns))
+    return hashlib.sha256(json.dumps(entries).encode()).hexdigest()[:16]
+
+def content_fingerprint(*paths):
+    """Identity of input files from their names and content (read in 1 MB blocks); survives
+    rewrites that only touch modification times, such as re-extracting a download."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+def frame_fingerprint(df):
+    """Identity of an in-memory DataFrame from its columns and a vectorized row hash."""
+    import pandas as pd
+
+    digest = hashlib.sha256(json.dumps([str(col) for col in df.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+class Checkpoint:
+    """Durable chunk-level progress of one stage, stored as JSON and replaced atomically.
+
+    Progress only counts for the same input: a checkpoint written for another fingerprint is
+    discarded, so the stage starts fresh. Chunks are committed after their write is durable;
+    on retry the stage resumes at `next_chunk` and rewrites that chunk idempotently."""
+
+    def __init__(self, stage, fingerprint, directory=CHECKPOINT_DIR):
+        self.path = os.path.join(directory, f"{stage}.json")
+        self.stage = stage
+        self.fingerprint = fingerprint
+        self.completed = set()
+        self.state = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                saved = json.load(f)
+            if saved["fingerprint"] == fingerprint:
+                self.completed = set(saved["completed"])
+                self.state = saved["state"]
+                logging.info(f"✅ Resuming {stage} after {len(self.completed)} committed chunks.")
+            else:
+                logging.info(f"✅ Input of {stage} changed: previous checkpoint discarded.")
+
+    @property
+    def is_fresh(self):
+        """True when no chunk of this input was committed yet."""
+        return not self.completed and not self.state
+
+    @property
+    def next_chunk(self):
+        """First chunk that is not committed (chunks are committed in order)."""
+        chunk = 0
+        while chunk in self.completed:
+            chunk += 1
+        return chunk
+
+    def is_done(self, chunk):
+        return chunk in self.completed
+
+    def commit(self, chunk=None, **state):
+        """Records a chunk (and/or stage state such as a version number) durably."""
+        if chunk is not None:
+            self.completed.add(chunk)
+        self.state.update(state)
+        payload = {
+            "stage": self.stage,
+            "fingerprint": self.fingerprint,
+            "completed": sorted(self.completed),
+            "state": self.state,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        write_json_atomic(self.path, payload, indent=2)
+
+    def clear(self):
+        """Removes the checkpoint once the stage finished (the next run starts fresh)."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.completed, self.state = set(), {}
@@ -0,0 +1,88 @@
+import sys
+import time
+import argparse
+import importlib
+import subprocess
+from .pipeline_graph import PROJECT_DIR, STAGES
+
+# ✅ Tool Commands (`module:function`, imported only when invoked)
+TOOLS = {
+    "run_pipeline": ("pipeline_graph:main", "Run every stage locally in dependency order."),
+    "registry": ("model_registry:main", "List or promote registered model versions."),
+    "benchmark_forest": ("forest_inference:main", "Benchmark the flattened forest against sklearn."),
+    "prepare_scoring": ("data_preparation:scoring_main", "Prepare a scoring batch with the training statistics and vocabularies."),
+    "batch_score": ("forest_inference:score_main", "Score the latest features with the production model (resumable)."),
+    "benchmark_imports": ("cli:benchmark_imports", "Measure cold import time of every stage module."),
+    "sharded_pipeline": ("sharded_pipeline:main", "Coordinate a sharded run (prep → transform → features → scoring)."),
+    "shard_worker": ("sharded_pipeline:worker_main", "Run one shard's stages of a sharded run (one per node)."),
+}
+
+# ✅ Import Benchmark Settings
+BENCHMARK_MODULES = sorted({stage["entry"].split(":")[0] for stage in STAGES.values()} | {"cli"})
+BENCHMARK_REPEATS = 3
+
+def load_entry(entry):
+    """Imports `module:function` from this package on demand."""
+    module_name, function_name = entry.split(":")
+    return getattr(importlib.import_module(f".{module_name}", __package__), function_name)
+
+def _import_time(statement):
+    """Cumulative import time (seconds) of the last module imported by `statement`, via `-X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    )
+    last_line = [line for line in result.stderr.splitlines() if line.startswith("import time:")][-1]
+    return int(last_line.split("|")[1]) / 1e6
+
+def benchmark_imports(modules=BENCHMARK_MODULES, repeats=BENCHMARK_REPEATS):
+    """Measures cold import time per stage module (fresh interpreter, best of `repeats`) and `--help` latency."""
+    results = {}
+    for module in modules:
+        results[module] = min(_import_time(f"import {__package__}.{module}") for _ in range(repeats))
+    help_times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", __package__, "--help"], cwd=PROJECT_DIR, capture_output=True, check=True)
+        help_times.append(time.perf_counter() - started)
+    for module, seconds in sorted(results.items(), key=lambda item: -item[1]):
+        print(f"{module:<28} {seconds * 1000:>9.1f} ms")
+    print(f"{'--help (process wall time)':<28} {min(help_times) * 1000:>9.1f} ms")
+    return dict(results, help=min(help_times))
+
+def build_parser():
+    """One subcommand per pipeline stage plus the tool commands; nothing is imported until one runs."""
+    parser = argparse.ArgumentParser(prog=f"python -m {__package__}", description="Customer churn pipeline.")
+    subcommands = parser.add_subparsers(dest="subcommand", required=True, metavar="command")
+    for name, stage in STAGES.items():
+        subcommands.add_parser(name, help=f"Pipeline stage ({stage['entry']}).").set_defaults(entry=stage["entry"])
+    for name, (entry, help_text) in TOOLS.items():
+        subcommands.add_parser(name, help=help_text).set_defaults(entry=entry)
+
+    # Tool arguments are passed to the entry function as keyword arguments
+    registry_commands = subcommands.choices["registry"].add_subparsers(dest="command", required=True, metavar="{list,promote}")
+    registry_commands.add_parser("list", help="List registered versions.").add_argument("model_name")
+    promote_parser = registry_commands.add_parser("promote", help="Promote a version to production.")
+    promote_parser.add_argument("model_name")
+    promote_parser.add_argument("version")
+    subcommands.choices["prepare_scoring"].add_argument("source_path", nargs="?", default=argparse.SUPPRESS,
+                                                        help="Parquet file/dataset to prepare (default: the latest one).")
+    subcommands.choices["benchmark_imports"].add_argument("--repeats", type=int, default=BENCHMARK_REPEATS)
+    sharded_parser = subcommands.choices["sharded_pipeline"]
+    sharded_parser.add_argument("--shards", type=int, default=argparse.SUPPRESS)
+    sharded_parser.add_argument("--root", default=argparse.SUPPRESS, help="Shared directory for shard data and markers.")
+    sharded_parser.add_argument("--launch", choices=["local", "external"], default="local",
+                                help="local: one worker process per shard; external: workers are started on the nodes.")
+    sharded_parser.add_argument("--no-score", dest="score", action="store_false", help="Skip batch scoring.")
+    sharded_parser.add_argument("--feature-store", dest="feature_store", default=argparse.SUPPRESS,
+                                help="Offline feature store reachable by every node (default: <root>/feature_store for external runs).")
+    worker_parser = subcommands.choices["shard_worker"]
+    worker_parser.add_argument("shard", type=int)
+    worker_parser.add_argument("--root", default=argparse.SUPPRESS)
+    return parser
+
+def main(argv=None):
+    """Runs a subcommand; returns its exit code (gate stages return SKIP_EXIT_CODE to skip downstream)."""
+    args = vars(build_parser().parse_args(argv))
+    del args["subcommand"]
+    result = load_entry(args.pop("entry"))(**args)
+    return result if isinstance(result, int) else 0
@@ -1,44 +1,27 @@
-import pandas as pd
-import numpy as np
 import os
-import pickle
-import mlflow
-import mlflow.sklearn
-from datetime import datetime
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-from mlflow.models import infer_signature
+from .drift_detection import save_reference_profile
+from .model_evaluation import evaluate_predictions, save_report
+from .model_registry import model_slug, register_model, version_dir, promote_if_better
+from .forest_inference import save_flat_forest
+from .feature_store import feature_columns
+from .runtime import ensure_dirs, load_features, setup_logging
  
 # Define Paths
-FEATURES_DIR = "data/features/"
 MODELS_DIR = "models/"
 REPORTS_DIR = "reports/"
-os.makedirs(MODELS_DIR, exist_ok=True)
-os.makedirs(REPORTS_DIR, exist_ok=True)
- 
-# Load Latest Feature Data
-def get_latest_feature_file():
-    """Finds the latest feature dataset."""
-    feature_files = sorted(os.listdir(FEATURES_DIR), reverse=True)
-    for file in feature_files:
-        if file.endswith(".parquet"):
-            return os.path.join(FEATURES_DIR, file)
-    raise FileNotFoundError("No feature files found.")
- 
-def load_features():
-    """Loads the latest feature file."""
-    latest_feature_file = get_latest_feature_file()
-    print(f"Loading latest feature file: {latest_feature_file}")
-    return pd.read_parquet(latest_feature_file)
+AUTO_PROMOTE = os.environ.get("AUTO_PROMOTE", "1") == "1"  # Promote a new version when its F1 is not worse
  
 # Train & Evaluate Model
 def train_model(df):
     """Trains different models and logs results in MLflow."""
- 
-    # Define Target & Features
-    X = df.drop(columns=["Churn"])
+    import mlflow
+    from mlflow.models import infer_signature
+    from sklearn.model_selection import train_test_split
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.ensemble import RandomForestClassifier
+ 
+    # Define Target & Features (the customer key is not a feature)
+    X = df[feature_columns(df)].drop(columns=["Churn"])
     y = df["Churn"]
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
  
@@ -54,13 +37,13 @@ def train_model(df):
  
             # Train model
             model.fit(X_train, y_train)
-            y_pred = model.predict(X_test)
+            scores = model.predict_proba(X_test)
+            y_pred = model.classes_[scores.argmax(axis=1)]  # Same as model.predict, without a second pass
  
-            # Compute evaluation metrics
-            accuracy = accuracy_score(y_test, y_pred)
-            precision = precision_score(y_test, y_pred)
-            recall = recall_score(y_test, y_pred)
-            f1 = f1_score(y_test, y_pred)
+            # Evaluate once: confusion matrix, ranking curves, lift & bootstrap CIs
+            report = evaluate_predictions(y_test, y_pred, scores[:, 1])
+            metrics = report["metrics"]
+            accuracy, precision, recall, f1 = metrics["accuracy"], metrics["precision"], metrics["recall"], metrics["f1"]
  
             # Prepare input example & signature
             input_example = X_test.iloc[:1].to_dict(orient="records")  # Single row as example
@@ -72,38 +55,40 @@ def train_model(df):
                 "Accuracy": accuracy,
                 "Precision": precision,
                 "Recall": recall,
-                "F1 Score": f1
+                "F1 Score": f1,
+                "ROC AUC": metrics["roc_auc"],
+                "PR AUC": metrics["pr_auc"]
             })
  
-            # Define fixed model filename (overwrite existing file)
-            model_filename = f"{MODELS_DIR}/{model_name.lower().replace(' ', '_')}.pkl"
-            with open(model_filename, "wb") as f:
-                pickle.dump(model, f)
- 
-            # Log Model with Signature & Input Example
-            mlflow.sklearn.log_model(
-                model,
-                model_name.lower().replace(" ", "_"),
-                signature=signature,
-                input_example=input_example
-            )
+            # Serialize once into the versioned registry; MLflow gets the same artifact files
+            slug = model_slug(model_name)
+            version = register_model(model, model_name, {"metrics": metrics, "params": model.get_params()})
+            mlflow.set_tag("registry_version", version)
+            if isinstance(model, RandomForestClassifier):
+                save_flat_forest(model, model_name, version)  # Memory-mappable fast scoring path
+            mlflow.log_artifacts(version_dir(model_name, version), slug)
+            mlflow.log_dict(signature.to_dict(), f"{slug}/signature.json")
+            mlflow.log_dict({"records": input_example}, f"{slug}/input_example.json")
+            if AUTO_PROMOTE:
+                promote_if_better(model_name, version)
  
             print(f"{model_name} - Accuracy: {accuracy:.4f}, Precision: {precision:.4f}, Recall: {recall:.4f}, F1 Score: {f1:.4f}")
-            print(f"Model saved : {model_filename}")
+            print(f"Model registered: {model_name} version {version}")
  
-            # Define fixed report filename (overwrite existing file)
-            report_filename = f"{REPORTS_DIR}/{model_name.lower().replace(' ', '_')}.txt"
-            with open(report_filename, "w") as report_file:  # "w" mode replaces old content
-                report_file.write(f"Model: {model_name}\n")
-                report_file.write(f"Accuracy: {accuracy:.4f}\n")
-                report_file.write(f"Precision: {precision:.4f}\n")
-                report_file.write(f"Recall: {recall:.4f}\n")
-                report_file.write(f"F1 Score: {f1:.4f}\n")
+            # Versioned JSON report, also attached to the MLflow run
+            report_filename = save_report(report, model_name)
+            mlflow.log_artifact(report_filename, "evaluation")
  
             print(f"Report saved: {report_filename}")
             print(f"{model_name} - Modeling Completed")
  
-if __name__ == "__main__":
+def main():
+    setup_logging("modeling.log")
+    ensure_dirs(MODELS_DIR, REPORTS_DIR)
     df_features = load_features()
     train_model(df_features)
+    save_reference_profile(df_features)  # Snapshot for the next drift check
+
+if __name__ == "__main__":
+    main()
  
\ No newline at end of file
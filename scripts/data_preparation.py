@@ -1,35 +1,39 @@
 import os
+import json
+import functools
 import pandas as pd
 import logging
-from sklearn.preprocessing import StandardScaler, MinMaxScaler, LabelEncoder
-import matplotlib.pyplot as plt
-import seaborn as sns
-from imblearn.over_sampling import SMOTE
- 
-# ✅ Configure logging
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-logging.basicConfig(
-    filename=os.path.join(LOG_DIR, "preparation.log"),
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+from datetime import datetime
+from .partitioning import N_WORKERS, PARTITION_ROWS, list_partitions, read_partition, run_partitioned
+from .streaming_stats import ColumnSummary
+from .categorical_encoding import ENCODING_DIR, CategoricalEncoder
+from .event_features import ENTITY_COLUMN, attach_event_features
+from .runtime import setup_logging, write_json_atomic
  
 # ✅ Define Paths
 PARQUET_DIR = "data/processed/parquet/"
+RAW_PREFIX = "customer_churn_raw_"  # Written by store_parquet; other files in these folders are derived
+PREPARED_FILE = "customer_churn_prepared.parquet"
+SCORING_DIR = "data/scoring/"  # Outside PARQUET_DIR, so prepared batches are never picked up as raw input
+SCORING_PREPARED_FILE = os.path.join(SCORING_DIR, "customer_churn_scoring_prepared.parquet")
+TRAINING_STATS_FILE = os.path.join(ENCODING_DIR, "preparation_stats.json")  # Fill values & scaling ranges of training
+
+# ✅ Encoding Columns
+BINARY_CATEGORICAL_COLS = ["gender", "Partner", "Dependents", "PhoneService"]
+MULTI_CATEGORY_COLS = ["MultipleLines", "InternetService", "OnlineSecurity", "OnlineBackup"]
  
 def get_latest_parquet():
-    """Finds the latest Parquet file."""
+    """Finds the latest raw Parquet file (`customer_churn_raw_*`)."""
     if not os.path.exists(PARQUET_DIR):
         raise FileNotFoundError(f"❌ Parquet directory not found: {PARQUET_DIR}")
     subdirs = sorted(os.listdir(PARQUET_DIR), reverse=True)
     for subdir in subdirs:
         folder_path = os.path.join(PARQUET_DIR, subdir)
         if os.path.isdir(folder_path):
-            parquet_files = sorted([f for f in os.listdir(folder_path) if f.endswith(".parquet")], reverse=True)
+            parquet_files = sorted([f for f in os.listdir(folder_path) if f.startswith(RAW_PREFIX) and f.endswith(".parquet")], reverse=True)
             if parquet_files:
                 return os.path.join(folder_path, parquet_files[0])
-    raise FileNotFoundError("❌ No Parquet files found in any timestamped folder.")
+    raise FileNotFoundError("❌ No raw Parquet files found in any timestamped folder.")
  
 def load_data():
     """Loads the latest Parquet file."""
@@ -39,59 +43,181 @@ def load_data():
     df = pd.read_parquet(latest_parquet_file)
     return df
  
-def prepare_data(df):
-    """Prepares data by handling missing values, encoding, and scaling."""
-    # Normalize Churn Value
-    df["Churn"] = df["Churn"].replace({"Yes": 1, "No": 0}).astype(int)
-    # Drop the "customerID" column if present
-    if "customerID" in df.columns.tolist():
-        df.drop(columns=["customerID"], inplace=True)
-    # ✅ Handling Missing Values Using Recommended Pandas Method
-    df.fillna(df.mode().iloc[0], inplace=True)  # Use mode for categorical
-    df.fillna(df.median(numeric_only=True), inplace=True)  # Use median for numerical
-   
-    # ✅ Label Encoding for Binary Categorical Columns
-    binary_categorical_cols = ["gender", "Partner", "Dependents", "PhoneService"]
-    label_encoder = LabelEncoder()
-    for col in binary_categorical_cols:
-        if col in df.columns:
-            df[col] = label_encoder.fit_transform(df[col])
-    # ✅ One-Hot Encoding for Multi-Category Columns
-    multi_category_cols = ["MultipleLines", "InternetService", "OnlineSecurity", "OnlineBackup"]
-    existing_categorical_columns = [col for col in multi_category_cols if col in df.columns]
-    if existing_categorical_columns:
-        df = pd.get_dummies(df, columns=existing_categorical_columns, drop_first=True)
-
-     # ✅ Standardization (Z-score Scaling)
+def normalize_columns(df):
+    """Normalizes the target and attaches event features (row-wise, so safe per partition). `customerID`
+    is kept as the entity key: it is excluded from statistics and SMOTE and becomes EntityID in the feature store."""
+    # Normalize Churn Value (scoring batches may come without the label)
+    if "Churn" in df.columns:
+        df["Churn"] = df["Churn"].replace({"Yes": 1, "No": 0}).astype(int)
+    # Windowed billing/support features by customer (no-op when the event_features stage found no logs)
+    df = attach_event_features(df)
+    return df
+
+def compute_partial_stats(df):
+    """Computes mergeable one-pass column summaries (sketches) for one partition (entity key excluded)."""
+    return {col: ColumnSummary.from_series(df[col]) for col in df.columns if col != ENTITY_COLUMN}
+
+def merge_stats(partials):
+    """Merges partial summaries into global fill values, vocabularies and scaling ranges."""
+    columns = list(dict.fromkeys(col for partial in partials for col in partial))
+    stats = {"mode": {}, "median": {}, "vocabularies": {}, "min": {}, "max": {}}
+    for col in columns:
+        summary = functools.reduce(ColumnSummary.merge, [partial[col] for partial in partials if col in partial])
+        if summary.frequencies.n == 0:
+            continue
+        stats["mode"][col] = summary.mode()
+        if col in BINARY_CATEGORICAL_COLS + MULTI_CATEGORY_COLS:
+            stats["vocabularies"][col] = summary.vocabulary()
+        if summary.numeric:
+            stats["median"][col] = summary.median()
+            stats["min"][col] = summary.moments.min
+            stats["max"][col] = summary.moments.max
+    stats["mode"] = pd.Series(stats["mode"], dtype=object)
+    stats["median"] = pd.Series(stats["median"], dtype="float64")
+    return stats
+
+def attach_encoder(stats):
+    """Fits the categorical encoder on merged training statistics and persists it together with the
+    fill values and scaling ranges, so `load_training_stats` can prepare scoring batches identically."""
+    stats["encoder"] = CategoricalEncoder.from_stats(stats, BINARY_CATEGORICAL_COLS, MULTI_CATEGORY_COLS)
+    stats["encoder"].save()
+    payload = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "mode": stats["mode"].to_dict(),
+        "median": stats["median"].to_dict(),
+        "min": stats["min"],
+        "max": stats["max"],
+    }
+    # NumPy scalars → Python values (NaN stays NaN)
+    write_json_atomic(TRAINING_STATS_FILE, payload, indent=2, default=lambda value: value.item() if hasattr(value, "item") else str(value))
+    logging.info(f"📂 Preparation statistics saved: {TRAINING_STATS_FILE}")
+    return stats
+
+def load_training_stats(path=TRAINING_STATS_FILE):
+    """Statistics and encoder persisted by the last training preparation (used for scoring batches)."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"❌ Preparation statistics not found: {path} (run data preparation for training first)")
+    with open(path) as f:
+        payload = json.load(f)
+    return {
+        "mode": pd.Series(payload["mode"], dtype=object),
+        "median": pd.Series(payload["median"], dtype="float64"),
+        "min": payload["min"],
+        "max": payload["max"],
+        "encoder": CategoricalEncoder.load(),
+    }
+
+def apply_preparation(df, stats):
+    """Applies imputation, encoding and scaling using precomputed global statistics."""
+    from sklearn.preprocessing import MinMaxScaler
+
+    # ✅ Handling Missing Values (mode for categorical, median for numerical)
+    df.fillna(stats["mode"], inplace=True)
+    df.fillna(stats["median"], inplace=True)
+
+    # ✅ Label Encoding (binary columns) & One-Hot Encoding (multi-category columns) with fixed vocabularies
+    encoder = stats["encoder"]
+    df = encoder.transform(df)
+    scaling_range = {col: (0, len(vocabulary) - 1) for col, vocabulary in encoder.label_vocabularies.items()}
+
+    # ✅ Normalization (Min-Max Scaling) with the global data range
     numerical_cols = df.select_dtypes(include=['int64', 'float64']).columns.tolist()
     numerical_cols = [col for col in numerical_cols if col != "Churn"]  # Exclude target variable
-    
-    # ✅ Normalization (Min-Max Scaling)
     if numerical_cols:
+        for col in numerical_cols:
+            scaling_range.setdefault(col, (stats["min"].get(col), stats["max"].get(col)))
         minmax_scaler = MinMaxScaler()
-        df[numerical_cols] = minmax_scaler.fit_transform(df[numerical_cols])
+        minmax_scaler.fit(pd.DataFrame({col: scaling_range[col] for col in numerical_cols}))
+        df[numerical_cols] = minmax_scaler.transform(df[numerical_cols])
+    return df
+
+def apply_smote(df, synthetic_prefix="synthetic"):
+    """Applies SMOTE oversampling for imbalanced data (global step, needs every row). Original rows keep
+    their customer ID; synthetic rows get `<synthetic_prefix>-<n>`."""
+    from imblearn.over_sampling import SMOTE
 
-    #✅ Apply SMOTE for Imbalanced Data
     smote = SMOTE(random_state=42)
-    X, y = df.drop(columns=["Churn"]), df["Churn"]
+    ids = df[ENTITY_COLUMN].astype(str).tolist() if ENTITY_COLUMN in df.columns else None
+    X, y = df.drop(columns=["Churn", ENTITY_COLUMN], errors="ignore"), df["Churn"]
     X_resampled, y_resampled = smote.fit_resample(X, y)
-    df = pd.concat([pd.DataFrame(X_resampled, columns=X.columns), pd.DataFrame(y_resampled, columns=["Churn"])], axis=1)
-    
+    resampled = pd.concat([pd.DataFrame(X_resampled, columns=X.columns), pd.DataFrame(y_resampled, columns=["Churn"])], axis=1)
+    if ids is not None:
+        # SMOTE returns the original rows first, then the synthetic ones
+        resampled.insert(0, ENTITY_COLUMN, ids + [f"{synthetic_prefix}-{i}" for i in range(len(resampled) - len(ids))])
+    return resampled
+
+def prepare_data(df):
+    """Prepares data by handling missing values, encoding, and scaling."""
+    df = normalize_columns(df)
+    stats = attach_encoder(merge_stats([compute_partial_stats(df)]))
+    df = apply_preparation(df, stats)
+    df = apply_smote(df)
+
     logging.info("✅ Data Preparation Completed Successfully.")
     print("✅ Data Preparation Completed Successfully.")
     return df
+
+def _partition_stats(partition):
+    """Pass 1 worker: partial statistics for one partition."""
+    return compute_partial_stats(normalize_columns(read_partition(partition)))
+
+def _prepare_partition(partition, stats):
+    """Pass 2 worker: prepares one partition with the merged global statistics."""
+    return apply_preparation(normalize_columns(read_partition(partition)), stats)
+
+def prepare_data_parallel(source_path, n_workers=N_WORKERS):
+    """Partition-parallel `prepare_data` over a Parquet file/dataset; results match the single-process path."""
+    partitions = list_partitions(source_path)
+    logging.info(f"✅ Preparing {len(partitions)} partitions with {n_workers} workers")
+    stats = attach_encoder(merge_stats(run_partitioned(_partition_stats, partitions, n_workers)))
+    prepared = run_partitioned(_prepare_partition, partitions, n_workers, stats=stats)
+    df = apply_smote(pd.concat(prepared, ignore_index=True))
+
+    logging.info("✅ Data Preparation Completed Successfully.")
+    print("✅ Data Preparation Completed Successfully.")
+    return df
+
+def prepare_scoring_data(source_path, n_workers=N_WORKERS):
+    """Prepares a batch for scoring with everything persisted by training: fill values, scaling
+    ranges and vocabularies (unseen categories encode as all zeros). Nothing is computed from the
+    batch itself, and there is no SMOTE, so every row is kept."""
+    partitions = list_partitions(source_path)
+    logging.info(f"✅ Preparing {len(partitions)} scoring partitions with {n_workers} workers")
+    prepared = run_partitioned(_prepare_partition, partitions, n_workers, stats=load_training_stats())
+    df = pd.concat(prepared, ignore_index=True)
+
+    logging.info("✅ Scoring Data Preparation Completed Successfully.")
+    print("✅ Scoring Data Preparation Completed Successfully.")
+    return df
  
 def save_prepared_data(df):
     """Saves the prepared dataset back to the Parquet folder."""
     os.makedirs(PARQUET_DIR, exist_ok=True)
     latest_folder = sorted(os.listdir(PARQUET_DIR), reverse=True)[0]
-    prepared_file_path = os.path.join(PARQUET_DIR, latest_folder, "customer_churn_prepared.parquet")
-    df.to_parquet(prepared_file_path, index=False)
+    prepared_file_path = os.path.join(PARQUET_DIR, latest_folder, PREPARED_FILE)
+    df.to_parquet(prepared_file_path, index=False, row_group_size=PARTITION_ROWS)
     logging.info(f"📂 Prepared Data Saved: {prepared_file_path}")
     print(f"✅ Prepared Data Saved at: {prepared_file_path}")
  
+def save_scoring_data(df, path=SCORING_PREPARED_FILE):
+    """Saves a prepared scoring batch to the scoring folder."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_parquet(path, index=False, row_group_size=PARTITION_ROWS)
+    logging.info(f"📂 Scoring Data Saved: {path}")
+    print(f"✅ Scoring Data Saved at: {path}")
+ 
+def load_prepared_data():
+    """Loads the prepared dataset written by `save_prepared_data`."""
+    latest_folder = sorted(os.listdir(PARQUET_DIR), reverse=True)[0]
+    prepared_file_path = os.path.join(PARQUET_DIR, latest_folder, PREPARED_FILE)
+    logging.info(f"✅ Loading prepared Parquet file: {prepared_file_path}")
+    return pd.read_parquet(prepared_file_path)
+ 
 def generate_visualizations(df):
     """Generates meaningful visualizations for customer churn analysis."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     VISUAL_DIR = "visualizations"
     os.makedirs(VISUAL_DIR, exist_ok=True)
     # ✅ Churn Distribution
@@ -117,8 +243,20 @@ def generate_visualizations(df):
     print("✅ Visualizations generated and saved to", VISUAL_DIR)
     logging.info("✅ Visualizations generated successfully.")
  
-if __name__ == "__main__":
-    df = load_data()
-    df_prepared = prepare_data(df)
+def main():
+    setup_logging("preparation.log")
+    df_prepared = prepare_data_parallel(get_latest_parquet())
     save_prepared_data(df_prepared)
-    generate_visualizations(df_prepared)
\ No newline at end of file
+ 
+def scoring_main(source_path=None):
+    """Prepares a scoring batch (default: the latest raw Parquet file) with the training statistics."""
+    setup_logging("preparation.log")
+    save_scoring_data(prepare_scoring_data(source_path or get_latest_parquet()))
+ 
+def visualize():
+    """Visualizations run as their own stage, off the critical path."""
+    setup_logging("preparation.log")
+    generate_visualizations(load_prepared_data())
+ 
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,20 @@
 import pandas as pd
 import numpy as np
-import pyodbc
 import os
 import logging
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
-
-# ✅ Configure logging
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-logging.basicConfig(
-    filename=os.path.join(LOG_DIR, "transformation.log"),
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+from .partitioning import N_WORKERS, list_partitions, read_partition, run_partitioned, reset_output, write_partition
+from .streaming_stats import RunningMoments
+from .runtime import setup_logging
+from .checkpoint import Checkpoint, frame_fingerprint
+from .feature_store import DB_DIALECT, get_db_connection
 
 # ✅ Define Paths
 PARQUET_DIR = "data/processed/parquet/"
 TRANSFORMED_DIR = "data/transformed/"
 
+# ✅ SQL Load Settings
+SQL_CHUNK_ROWS = int(os.environ.get("SQL_LOAD_CHUNK_ROWS", 50_000))  # Rows per committed (checkpointed) chunk
+
 def get_latest_prepared_parquet():
     """Finds the latest `customer_churn_prepared.parquet` file in the newest timestamped folder."""
     subdirs = sorted(os.listdir(PARQUET_DIR), reverse=True)  # Get latest folder first
@@ -37,11 +34,12 @@ def load_data():
     df = pd.read_parquet(latest_prepared_file)
     return df
 
-def transform_data(df):
-    """Feature Engineering & Final Transformations."""
+def engineer_features(df):
+    """Row-wise Feature Engineering (safe to apply per partition)."""
 
-    # ✅ 1️⃣ Recency Score (More recent = Higher score)
-    df["last_purchase_recency"] = df["tenure"].apply(lambda x: 1 / (x + 1))
+    # ✅ 1️⃣ Recency Score (More recent = Higher score): days since the last billing event, tenure as a proxy without events
+    recency_source = "billing_days_since_last" if "billing_days_since_last" in df.columns else "tenure"
+    df["last_purchase_recency"] = 1 / (df[recency_source] + 1)
 
     # ✅ 2️⃣ Engagement Score (Sum of subscribed services → Already encoded as 0/1)
     service_cols = [col for col in df.columns if "OnlineSecurity" in col or "OnlineBackup" in col or "PhoneService" in col or "MultipleLines" in col]
@@ -54,87 +52,150 @@ def transform_data(df):
    # df["total_spend"] = df["tenure"] * 50  # Assume avg spend of $50/month
    # df["customer_tenure_years"] = df["tenure"] / 12  # Convert months to years  
 
-    # ✅ 4️⃣ High Support Calls (Flagging risky customers)
-    if "OnlineSecurity_Yes" in df.columns:
+    # ✅ 4️⃣ High Support Calls (Flagging risky customers): set from support events when present, proxy otherwise
+    if "OnlineSecurity_Yes" in df.columns and "high_support_calls" not in df.columns:
         df["high_support_calls"] = np.where(df["OnlineSecurity_Yes"] == 0, 1, 0)
 
-    # ✅ Scaling Numerical Features
-    numerical_cols = df.select_dtypes(include=["int64", "float64"]).columns.tolist()
+    return df
+
+def get_numerical_cols(df):
+    """Columns that get Min-Max scaled."""
+    return df.select_dtypes(include=["int64", "float64"]).columns.tolist()
+
+def compute_partial_ranges(df):
+    """Mergeable per-partition running moments (min/max/mean/variance) of the numerical columns."""
+    return {col: RunningMoments().update(df[col]) for col in get_numerical_cols(df)}
+
+def merge_ranges(partials):
+    """Merges partial moments into the global [min, max] frame used to fit the scaler."""
+    moments = {}
+    for partial in partials:
+        for col, summary in partial.items():
+            moments.setdefault(col, RunningMoments()).merge(summary)
+    return pd.DataFrame({col: [summary.min, summary.max] for col, summary in moments.items()})
+
+def scale_features(df, ranges):
+    """Min-Max scales numerical columns with the global data range."""
+    from sklearn.preprocessing import MinMaxScaler
+
+    numerical_cols = get_numerical_cols(df)
     #scaler = StandardScaler()
     #df[numerical_cols] = scaler.fit_transform(df[numerical_cols])
 
     # ✅ Normalization (Min-Max Scaling)
     minmax_scaler = MinMaxScaler()
-    df[numerical_cols] = minmax_scaler.fit_transform(df[numerical_cols])
+    minmax_scaler.fit(ranges[numerical_cols])
+    df[numerical_cols] = minmax_scaler.transform(df[numerical_cols])
+    return df
+
+def transform_data(df):
+    """Feature Engineering & Final Transformations."""
+    df = engineer_features(df)
+    df = scale_features(df, merge_ranges([compute_partial_ranges(df)]))
 
     logging.info("✅ Data Transformation Completed Successfully.")
     print("✅ Data Transformation Completed Successfully.")
     
     return df
 
+def _partition_ranges(partition):
+    """Pass 1 worker: engineered-feature ranges for one partition."""
+    return compute_partial_ranges(engineer_features(read_partition(partition)))
+
+def _transform_partition(task, ranges, output_path):
+    """Pass 2 worker: transforms one partition and writes it as an output part."""
+    index, partition = task
+    df = scale_features(engineer_features(read_partition(partition)), ranges)
+    return write_partition(df, output_path, index)
+
+def transform_data_parallel(source_path, output_path, n_workers=N_WORKERS):
+    """Partition-parallel `transform_data`; writes one output part per input partition."""
+    partitions = list_partitions(source_path)
+    logging.info(f"✅ Transforming {len(partitions)} partitions with {n_workers} workers")
+    ranges = merge_ranges(run_partitioned(_partition_ranges, partitions, n_workers))
+    reset_output(output_path)
+    part_paths = run_partitioned(_transform_partition, list(enumerate(partitions)), n_workers, ranges=ranges, output_path=output_path)
+
+    logging.info(f"📂 Transformed Data Saved: {output_path} ({len(part_paths)} parts)")
+    print(f"✅ Transformed Data Saved at: {output_path}")
+    return output_path
+
+def get_transformed_path():
+    """Output path of the transformed dataset for the newest timestamped folder."""
+    latest_folder = sorted(os.listdir(PARQUET_DIR), reverse=True)[0]
+    return os.path.join(TRANSFORMED_DIR, f"{latest_folder}_transformed.parquet")
+
 def save_transformed_data(df):
     """Saves transformed dataset."""
     os.makedirs(TRANSFORMED_DIR, exist_ok=True)
 
-    latest_folder = sorted(os.listdir(PARQUET_DIR), reverse=True)[0]
-    transformed_file_path = os.path.join(TRANSFORMED_DIR, f"{latest_folder}_transformed.parquet")
+    transformed_file_path = get_transformed_path()
+    reset_output(transformed_file_path)
 
     df.to_parquet(transformed_file_path, index=False)
     logging.info(f"📂 Transformed Data Saved: {transformed_file_path}")
     print(f"✅ Transformed Data Saved at: {transformed_file_path}")
 
-def store_in_sql(df):
-    """Stores transformed data into SQL Server with table recreation & truncation."""
-    conn = pyodbc.connect(
-        'DRIVER={ODBC Driver 17 for SQL Server};'
-        'SERVER=192.168.29.40;'
-        'DATABASE=PG;'
-        'UID=bits;'
-        'PWD=mnblkj147'
-    )
+def store_in_sql(df, chunk_rows=SQL_CHUNK_ROWS):
+    """Stores transformed data into SQL Server in checkpointed chunks; a retry resumes after the last committed chunk."""
+    conn = get_db_connection()
     cursor = conn.cursor()
-    
-    table_name = "CustomerChurnTransformed"
+    if DB_DIALECT == "mssql":
+        cursor.fast_executemany = True
 
-    # ✅ Drop table if exists
-    drop_table_sql = f"IF OBJECT_ID('{table_name}', 'U') IS NOT NULL DROP TABLE {table_name};"
-    cursor.execute(drop_table_sql)
-    conn.commit()
-
-    # ✅ Create Table Dynamically Based on DataFrame Columns
-    column_definitions = []
-    for col in df.columns:
-        if df[col].dtype == "int64":
-            col_type = "INT"
-        elif df[col].dtype == "float64":
-            col_type = "FLOAT"
-        else:
-            col_type = "NVARCHAR(255)"  # Default to string
-        column_definitions.append(f"[{col}] {col_type}")
-
-    create_table_sql = f"""
-    CREATE TABLE {table_name} (
-        {', '.join(column_definitions)}
-    );
-    """
-    cursor.execute(create_table_sql)
-    conn.commit()
-
-    # ✅ Insert Data Dynamically
-    column_names = ", ".join([f"[{col}]" for col in df.columns])
-    placeholders = ", ".join(["?" for _ in df.columns])
+    table_name = "CustomerChurnTransformed"
+    checkpoint = Checkpoint("store_in_sql", f"{frame_fingerprint(df)}-{chunk_rows}")
+
+    if checkpoint.is_fresh:
+        # ✅ Drop table if exists (fresh start only: a retry keeps the committed chunks)
+        cursor.execute(f"DROP TABLE IF EXISTS {table_name};")
+        conn.commit()
+
+        # ✅ Create Table Dynamically Based on DataFrame Columns
+        column_definitions = ["[RowID] BIGINT NOT NULL PRIMARY KEY"]
+        for col in df.columns:
+            if df[col].dtype == "int64":
+                col_type = "INT"
+            elif df[col].dtype == "float64":
+                col_type = "FLOAT"
+            else:
+                col_type = "NVARCHAR(255)"  # Default to string
+            column_definitions.append(f"[{col}] {col_type}")
+
+        create_table_sql = f"""
+        CREATE TABLE {table_name} (
+            {', '.join(column_definitions)}
+        );
+        """
+        cursor.execute(create_table_sql)
+        conn.commit()
+
+    # ✅ Insert Data in Chunks (delete the chunk's RowID range first, so re-inserting is idempotent)
+    column_names = ", ".join(["[RowID]"] + [f"[{col}]" for col in df.columns])
+    placeholders = ", ".join(["?"] * (len(df.columns) + 1))
     insert_sql = f"INSERT INTO {table_name} ({column_names}) VALUES ({placeholders})"
+    values = df.astype(object).where(df.notna(), None)
+
+    for chunk, start in enumerate(range(0, len(df), chunk_rows)):
+        if checkpoint.is_done(chunk):
+            continue
+        end = min(start + chunk_rows, len(df))
+        cursor.execute(f"DELETE FROM {table_name} WHERE RowID >= ? AND RowID < ?", (start, end))
+        rows = values.iloc[start:end].itertuples(index=False, name=None)
+        cursor.executemany(insert_sql, [(start + i,) + row for i, row in enumerate(rows)])
+        conn.commit()
+        checkpoint.commit(chunk)
+        logging.info(f"✅ Stored rows {start}-{end} of {len(df)}.")
 
-    for _, row in df.iterrows():
-        cursor.execute(insert_sql, tuple(row))
-
-    conn.commit()
     conn.close()
+    checkpoint.clear()
     logging.info("✅ Data successfully stored in SQL Server.")
     print("✅ Data successfully stored in SQL Server.")
 
+def main():
+    setup_logging("transformation.log")
+    transformed_path = transform_data_parallel(get_latest_prepared_parquet(), get_transformed_path())
+    store_in_sql(pd.read_parquet(transformed_path))
+
 if __name__ == "__main__":
-    df = load_data()
-    df_transformed = transform_data(df)
-    save_transformed_data(df_transformed)
-    store_in_sql(df_transformed)
+    main()
@@ -2,20 +2,16 @@ import os
 import pandas as pd
 import logging
 from datetime import datetime
-
-# Configure logging
-logging.basicConfig(
-    filename="logs/validation.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+from .runtime import setup_logging
 
 # Define paths
 PARQUET_DIR = "data/processed/parquet/"
+RAW_PREFIX = "customer_churn_raw_"  # Written by store_parquet; prepared files live next to it
 REPORT_PATH = "reports/data_quality_report.csv"
+MAX_MISSING_RATIO = float(os.environ.get("VALIDATION_MAX_MISSING_RATIO", 0.2))  # Gate threshold
 
 def get_latest_parquet():
-    """Finds the latest Parquet file in the directory."""
+    """Finds the latest raw Parquet file (`customer_churn_raw_*`) in the directory."""
     if not os.path.exists(PARQUET_DIR):
         raise FileNotFoundError(f"❌ Parquet directory not found: {PARQUET_DIR}")
 
@@ -24,7 +20,7 @@ def get_latest_parquet():
     for subdir in subdirs:
         folder_path = os.path.join(PARQUET_DIR, subdir)
         if os.path.isdir(folder_path):
-            parquet_files = sorted([f for f in os.listdir(folder_path) if f.endswith(".parquet")], reverse=True)
+            parquet_files = sorted([f for f in os.listdir(folder_path) if f.startswith(RAW_PREFIX) and f.endswith(".parquet")], reverse=True)
             if parquet_files:
                 return os.path.join(folder_path, parquet_files[0])
 
@@ -84,6 +80,21 @@ def generate_quality_report(df):
     logging.info(f"📊 Data Quality Report saved: {REPORT_PATH}")
     print(f"✅ Data Quality Report saved at: {REPORT_PATH}")
 
-if __name__ == "__main__":
+def check_quality_gate(df):
+    """Fails the stage (blocking the feature-store publish) when the data is unusable."""
+    if df.empty:
+        raise ValueError("❌ Quality gate failed: dataset is empty.")
+    missing_ratio = df.isnull().to_numpy().mean()
+    if missing_ratio > MAX_MISSING_RATIO:
+        raise ValueError(f"❌ Quality gate failed: {missing_ratio:.1%} of values are missing (max {MAX_MISSING_RATIO:.0%}).")
+    logging.info(f"✅ Quality gate passed ({missing_ratio:.1%} missing values).")
+    print(f"✅ Quality gate passed ({missing_ratio:.1%} missing values).")
+
+def main():
+    setup_logging("validation.log")
     df = load_data()
     generate_quality_report(df)
+    check_quality_gate(df)
+
+if __name__ == "__main__":
+    main()
@@ -1,87 +1,194 @@
 import os
+import json
+import hashlib
 import subprocess
 import logging
-from datetime import datetime
-
-# ✅ Set up logging
-LOG_FILE = "logs/track_raw_data.log"
-os.makedirs("logs", exist_ok=True)
-logging.basicConfig(
-    filename=LOG_FILE, level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
+from concurrent.futures import ThreadPoolExecutor
+from .runtime import setup_logging, write_json_atomic
 
 # ✅ Define dataset paths
 RAW_DATA_DIR = "data/raw"
-PARQUET_DIR = os.path.join(RAW_DATA_DIR, "parquet")
 PROCESSED_DIR = "data/processed"
 FEATURES_DIR = "data/features"
 TRANSFORMED_DIR = "data/transformed"
+TRACKED_DIRS = [RAW_DATA_DIR, PROCESSED_DIR, FEATURES_DIR, TRANSFORMED_DIR]
+
+# ✅ Local state (per-file size/mtime/md5 of the last tracked version; lives in DVC's untracked tmp dir)
+STATE_FILE = ".dvc/tmp/versioning_state.json"
+PENDING_PUSH_KEY = "_pending_push"  # Pushes owed since the last successful one (retried on every run)
+
+# ✅ Push settings (set to 0 to skip a push, e.g. offline runs)
+GIT_PUSH = os.environ.get("VERSIONING_GIT_PUSH", "1") == "1"
+DVC_PUSH = os.environ.get("VERSIONING_DVC_PUSH", "1") == "1"
+GIT_REMOTE = "origin"
+GIT_BRANCH = "main"
 
-def run_command(command):
-    """Executes a shell command and logs output or errors."""
+def run_command(args, repo_dir="."):
+    """Executes a command (argument list, no shell) and logs output or errors."""
     try:
-        result = subprocess.run(command, shell=True, check=True, text=True, capture_output=True)
-        logging.info(f"✅ SUCCESS: {command}")
+        result = subprocess.run(args, cwd=repo_dir, check=True, text=True, capture_output=True)
+        logging.info(f"✅ SUCCESS: {' '.join(args)}")
         return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        logging.error(f"❌ ERROR: {command}\n{e.stderr}")
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        logging.error(f"❌ ERROR: {' '.join(args)}\n{getattr(e, 'stderr', e)}")
         return None
 
-def get_latest_dataset():
-    """Finds the latest dataset folder inside data/raw/parquet/."""
-    if not os.path.exists(PARQUET_DIR):
-        logging.error(f"❌ Directory not found: {PARQUET_DIR}")
-        return None
+def _md5(path):
+    """MD5 of a file, read in 1 MB blocks."""
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-    folders = [f for f in os.listdir(PARQUET_DIR) if os.path.isdir(os.path.join(PARQUET_DIR, f))]
-    if not folders:
-        logging.error(f"❌ No timestamped dataset found in {PARQUET_DIR}.")
-        return None
+def directory_fingerprint(path, previous_files):
+    """Content digest of a directory. Files whose size and mtime match the previous state reuse their hash."""
+    files = {}
+    for root, _, names in os.walk(path):
+        for name in names:
+            file_path = os.path.join(root, name)
+            relative_path = os.path.relpath(file_path, path)
+            stat = os.stat(file_path)
+            previous = previous_files.get(relative_path)
+            if previous and previous["size"] == stat.st_size and previous["mtime_ns"] == stat.st_mtime_ns:
+                md5 = previous["md5"]
+            else:
+                md5 = _md5(file_path)
+            files[relative_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "md5": md5}
+    digest = hashlib.sha256(json.dumps(sorted((p, f["md5"]) for p, f in files.items())).encode()).hexdigest()
+    return digest, files
+
+def _refresh_mtimes(path, files):
+    """Re-reads size/mtime after `dvc add` (which may relink files without changing their content)."""
+    for relative_path, entry in files.items():
+        file_path = os.path.join(path, relative_path)
+        if os.path.exists(file_path):
+            stat = os.stat(file_path)
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    return files
+
+def load_state(repo_dir="."):
+    """Loads the per-directory versioning state."""
+    state_path = os.path.join(repo_dir, STATE_FILE)
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path) as f:
+        return json.load(f)
+
+def save_state(state, repo_dir="."):
+    """Writes the versioning state atomically."""
+    write_json_atomic(os.path.join(repo_dir, STATE_FILE), state)
+
+def find_changed_directories(folders, state, repo_dir="."):
+    """Returns the folders whose content changed (or were never tracked) and their new fingerprints."""
+    changed, fingerprints = [], {}
+    for folder in folders:
+        path = os.path.join(repo_dir, folder)
+        if not os.path.exists(path):
+            continue
+        previous = state.get(folder, {})
+        digest, files = directory_fingerprint(path, previous.get("files", {}))
+        fingerprints[folder] = {"digest": digest, "files": files}
+        if digest != previous.get("digest") or not os.path.exists(f"{path}.dvc"):
+            changed.append(folder)
+        else:
+            logging.info(f"✅ Unchanged, skipping: {folder}")
+    return changed, fingerprints
+
+def remove_git_tracking(paths, repo_dir="."):
+    """Removes directories from Git tracking (staged only; committed with the DVC files); returns them."""
+    tracked = run_command(["git", "ls-files", "--", *paths], repo_dir)
+    if not tracked:
+        return []
+    tracked_paths = [path for path in paths if any(line.startswith(path.rstrip("/") + "/") for line in tracked.splitlines())]
+    run_command(["git", "rm", "-r", "--cached", "-q", "--", *tracked_paths], repo_dir)
+    logging.info(f"✅ Removed {tracked_paths} from Git tracking.")
+    return tracked_paths
+
+def unstage(paths, repo_dir="."):
+    """Resets the index entries of `paths` to HEAD, so a failed run leaves nothing staged for later commits."""
+    if paths:
+        run_command(["git", "reset", "-q", "--", *paths], repo_dir)
+
+PUSH_COMMANDS = {"git": ["git", "push", GIT_REMOTE, GIT_BRANCH], "dvc": ["dvc", "push"]}
+
+def push_changes(targets, repo_dir="."):
+    """Pushes the given targets ("git", "dvc") concurrently; returns the targets that failed."""
+    if not targets:
+        return []
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        results = list(executor.map(lambda target: run_command(PUSH_COMMANDS[target], repo_dir), targets))
+    return [target for target, result in zip(targets, results) if result is None]
+
+def push_pending(state, repo_dir="."):
+    """Retries owed pushes (e.g. after an offline run) and keeps the failed ones pending."""
+    pending = state.get(PENDING_PUSH_KEY, [])
+    if not pending:
+        return []
+    failed = push_changes(pending, repo_dir)
+    state[PENDING_PUSH_KEY] = failed
+    save_state(state, repo_dir)
+    if failed:
+        logging.warning(f"⚠️ Push failed, will retry on the next run: {', '.join(failed)}")
+        print(f"⚠️ Push failed, will retry on the next run: {', '.join(failed)}")
+    return failed
+
+def commit_files(git_files, message, repo_dir="."):
+    """Stages and commits files; raises if Git fails (nothing staged counts as already committed)."""
+    if run_command(["git", "add", "--", *git_files], repo_dir) is None:
+        raise RuntimeError(f"❌ git add failed for: {', '.join(git_files)}")
+    staged = run_command(["git", "diff", "--cached", "--name-only"], repo_dir)  # Includes `git rm --cached` removals
+    if staged is None:
+        raise RuntimeError("❌ Could not inspect the Git index.")
+    if staged and run_command(["git", "commit", "-m", message], repo_dir) is None:
+        raise RuntimeError(f"❌ git commit failed: {message}")
+
+def track_data_with_dvc(repo_dir=".", folders=TRACKED_DIRS, git_push=GIT_PUSH, dvc_push=DVC_PUSH):
+    """Tracks changed dataset directories with one `dvc add` and one Git commit; returns the changed folders."""
 
-    latest_folder = max(folders)  # Assuming folders are named with timestamps (YYYY-MM-DD)
-    latest_path = os.path.join(PARQUET_DIR, latest_folder)
-    
-    logging.info(f"✅ Latest dataset found: {latest_path}")
-    return latest_path
-
-def remove_git_tracking(path):
-    """Removes a directory from Git tracking if it's already tracked."""
-    if os.path.exists(path):
-        git_ls = run_command(f"git ls-files --error-unmatch {path}")
-        if git_ls is not None:
-            run_command(f"git rm -r --cached {path}")
-            run_command(f"git commit -m 'Stop tracking {path} in Git'")
-            logging.info(f"✅ Removed {path} from Git tracking.")
-
-def track_data_with_dvc():
-    """Tracks dataset directories in DVC & commits changes to Git."""
-    
     logging.info("🚀 Starting data tracking process...")
+    state = load_state(repo_dir)
+    changed, fingerprints = find_changed_directories(folders, state, repo_dir)
+    if not changed:
+        logging.info("✅ No dataset changes since the last tracked version.")
+        print("✅ No dataset changes since the last tracked version.")
+        push_pending(state, repo_dir)
+        return []
 
-    # Get latest dataset version
-    latest_dataset = get_latest_dataset()
-    if latest_dataset:
-        logging.info(f"📂 Tracking latest dataset in {latest_dataset}")
-        run_command(f"dvc add {latest_dataset}")
-        run_command(f"git add {latest_dataset}.dvc")
-        run_command(f"git commit -m 'Tracked new dataset: {latest_dataset}'")
-
-    # Remove `data/raw` and `data/processed` from Git tracking (if necessary)
-    remove_git_tracking(RAW_DATA_DIR)
-    remove_git_tracking(PROCESSED_DIR)
-
-    # Track major dataset directories in DVC
-    for folder in [RAW_DATA_DIR, PROCESSED_DIR, FEATURES_DIR, TRANSFORMED_DIR]:
-        if os.path.exists(folder):
-            run_command(f"dvc add {folder}")
-            run_command(f"git add {folder}.dvc")
-            run_command(f"git commit -m 'Tracked {folder} with DVC'")
-
-    # Push changes to Git & DVC
-    run_command("git push origin main")
-    run_command("dvc push")
-    logging.info("🚀 All dataset versions tracked & pushed successfully.")
-    print("🚀 All dataset versions tracked & pushed successfully.")
+    # Stop tracking data folders in Git (DVC refuses outputs Git tracks), then hash & cache them in a single DVC call
+    untracked = remove_git_tracking(changed, repo_dir)
+    if run_command(["dvc", "add", *changed], repo_dir) is None:
+        unstage(untracked, repo_dir)
+        raise RuntimeError(f"❌ dvc add failed for: {', '.join(changed)}")
 
-if __name__ == "__main__":
+    # One commit for every updated .dvc file (plus the .gitignore entries DVC maintains)
+    git_files = [f"{folder}.dvc" for folder in changed]
+    git_files += sorted({
+        os.path.join(os.path.dirname(folder), ".gitignore") for folder in changed
+        if os.path.exists(os.path.join(repo_dir, os.path.dirname(folder), ".gitignore"))
+    })
+    try:
+        commit_files(git_files, f"Track data versions: {', '.join(changed)}", repo_dir)
+    except RuntimeError:
+        unstage(untracked + git_files, repo_dir)
+        raise
+
+    # State is saved only once the version is committed, so a failed commit is retried next run
+    for folder in changed:
+        fingerprints[folder]["files"] = _refresh_mtimes(os.path.join(repo_dir, folder), fingerprints[folder]["files"])
+        state[folder] = fingerprints[folder]
+    owed = [target for target, enabled in (("git", git_push), ("dvc", dvc_push)) if enabled]
+    state[PENDING_PUSH_KEY] = sorted(set(state.get(PENDING_PUSH_KEY, [])) | set(owed))
+    save_state(state, repo_dir)
+
+    push_pending(state, repo_dir)
+    logging.info(f"🚀 Dataset versions tracked: {', '.join(changed)}")
+    print(f"🚀 Dataset versions tracked: {', '.join(changed)}")
+    return changed
+
+def main():
+    setup_logging("track_raw_data.log")
     track_data_with_dvc()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from .pipeline_graph import SKIP_EXIT_CODE
+from .runtime import load_features, setup_logging
+
+# ✅ Define Paths
+DRIFT_DIR = "reports/drift/"
+REFERENCE_PROFILE = os.path.join(DRIFT_DIR, "reference_profile.json")
+
+# ✅ Retraining Gate Thresholds (override via environment)
+N_BINS = 10
+PSI_THRESHOLD = float(os.environ.get("DRIFT_PSI_THRESHOLD", 0.2))
+KS_THRESHOLD = float(os.environ.get("DRIFT_KS_THRESHOLD", 0.1))
+MAX_DAYS_WITHOUT_RETRAIN = int(os.environ.get("DRIFT_MAX_DAYS_WITHOUT_RETRAIN", 7))
+FORCE_RETRAIN = os.environ.get("DRIFT_FORCE_RETRAIN", "0") == "1"
+EPSILON = 1e-6
+
+def data_hash(df):
+    """Content hash of a DataFrame (detects byte-identical feature snapshots)."""
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+
+def feature_matrix(df, features=None):
+    """Numeric feature matrix (float64) and its column names."""
+    features = features or df.select_dtypes(include=["number", "bool"]).columns.tolist()
+    return df[features].to_numpy(dtype="float64", na_value=np.nan), features
+
+def bin_counts(X, edges):
+    """Histograms of every feature at once: (n_features, N_BINS) counts for per-feature inner edges."""
+    n_features = X.shape[1]
+    bins = np.empty(X.shape, dtype=np.intp)
+    for j in range(n_features):
+        bins[:, j] = np.searchsorted(edges[j], X[:, j], side="right")
+    valid = ~np.isnan(X)
+    flat = (bins + np.arange(n_features) * N_BINS)[valid]
+    return np.bincount(flat, minlength=n_features * N_BINS).reshape(n_features, N_BINS)
+
+def build_profile(df):
+    """Builds the training snapshot profile: reference decile edges and histograms per feature."""
+    X, features = feature_matrix(df)
+    edges = np.nanquantile(X, np.linspace(0, 1, N_BINS + 1)[1:-1], axis=0).T
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "rows": len(df),
+        "data_hash": data_hash(df),
+        "features": features,
+        "edges": edges.tolist(),
+        "counts": bin_counts(X, edges).tolist(),
+    }
+
+def compare_histograms(reference_counts, current_counts):
+    """Vectorized PSI and binned KS statistic for every feature."""
+    reference = reference_counts / np.maximum(reference_counts.sum(axis=1, keepdims=True), 1)
+    current = current_counts / np.maximum(current_counts.sum(axis=1, keepdims=True), 1)
+    ks = np.abs(np.cumsum(current, axis=1) - np.cumsum(reference, axis=1)).max(axis=1)
+    reference, current = np.clip(reference, EPSILON, None), np.clip(current, EPSILON, None)
+    psi = ((current - reference) * np.log(current / reference)).sum(axis=1)
+    return psi, ks
+
+def save_reference_profile(df):
+    """Persists the profile of the data the current models were trained on."""
+    os.makedirs(DRIFT_DIR, exist_ok=True)
+    with open(REFERENCE_PROFILE, "w") as f:
+        json.dump(build_profile(df), f)
+    logging.info(f"📂 Reference profile saved: {REFERENCE_PROFILE}")
+    print(f"✅ Reference profile saved at: {REFERENCE_PROFILE}")
+
+def check_drift(df):
+    """Compares the current features against the last training snapshot and decides whether to retrain."""
+    report = {"checked_at": datetime.now().isoformat(timespec="seconds"), "rows": len(df), "features": {}}
+    if FORCE_RETRAIN:
+        report.update(retrain=True, reason="Retraining forced via DRIFT_FORCE_RETRAIN.")
+    elif not os.path.exists(REFERENCE_PROFILE):
+        report.update(retrain=True, reason="No reference profile (first training run).")
+    else:
+        with open(REFERENCE_PROFILE) as f:
+            reference = json.load(f)
+        X, features = feature_matrix(df)
+        age_days = (datetime.now() - datetime.fromisoformat(reference["created_at"])).days
+        if data_hash(df) == reference["data_hash"]:
+            report.update(retrain=False, reason="Features are identical to the training snapshot.")
+        elif features != reference["features"]:
+            report.update(retrain=True, reason="Feature schema changed since the training snapshot.")
+        else:
+            edges = np.asarray(reference["edges"])
+            psi, ks = compare_histograms(np.asarray(reference["counts"]), bin_counts(X, edges))
+            report["features"] = {feature: {"psi": float(p), "ks": float(k)} for feature, p, k in zip(features, psi, ks)}
+            drifted = [feature for feature, p, k in zip(features, psi, ks) if p > PSI_THRESHOLD or k > KS_THRESHOLD]
+            if drifted:
+                report.update(retrain=True, reason=f"Drift detected in: {', '.join(drifted)}")
+            elif age_days >= MAX_DAYS_WITHOUT_RETRAIN:
+                report.update(retrain=True, reason=f"Last training snapshot is {age_days} days old.")
+            else:
+                report.update(retrain=False, reason="No feature exceeded the PSI/KS thresholds.")
+
+    os.makedirs(DRIFT_DIR, exist_ok=True)
+    report_path = os.path.join(DRIFT_DIR, f"drift_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"📊 Drift report saved: {report_path} (retrain={report['retrain']}: {report['reason']})")
+    print(f"✅ Drift report saved at: {report_path} → retrain={report['retrain']} ({report['reason']})")
+    return report
+
+def main():
+    """Gate entry point: returns SKIP_EXIT_CODE when no retraining is needed."""
+    setup_logging("drift.log")
+    drift_report = check_drift(load_features())
+    if not drift_report["retrain"]:
+        return SKIP_EXIT_CODE
+
+if __name__ == "__main__":
+    sys.exit(main())
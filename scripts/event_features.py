@@ -0,0 +1,172 @@
+import os
+import shutil
+import logging
+import functools
+import numpy as np
+import pandas as pd
+from .partitioning import N_WORKERS, list_partitions, read_partition, run_partitioned, reset_output
+from .runtime import setup_logging
+
+# ✅ Define Paths (event logs are Parquet files/datasets with customerID, event_time and an optional value column)
+EVENT_SOURCES = {
+    "billing": {"path": "data/events/billing/", "value": "amount"},
+    "support": {"path": "data/events/support/", "value": None},
+}
+EVENT_FEATURES_DIR = "data/event_features/"
+SPILL_DIR = "_spill"  # Inside the staging folder; removed before publishing
+
+# ✅ Window Settings
+ENTITY_COLUMN = "customerID"
+TIME_COLUMN = "event_time"
+WINDOWS_DAYS = (30, 90, 180)
+TREND_WINDOWS = (30, 180)  # Recent rate vs. long-run rate
+HIGH_SUPPORT_CALLS = int(os.environ.get("EVENT_HIGH_SUPPORT_CALLS", 3))  # Support events in 90 days that flag a customer
+N_BUCKETS = int(os.environ.get("EVENT_BUCKETS", 16))  # Customer hash buckets (each is aggregated in memory)
+AS_OF = os.environ.get("EVENT_FEATURES_AS_OF")  # Windows end here (default: newest event)
+SECONDS_PER_DAY = 86_400
+
+def window_aggregates(keys, times, values, as_of, windows_days=WINDOWS_DAYS):
+    """Counts and sums over trailing windows (as_of - window, as_of] for every key, in one vectorized pass.
+
+    Events are sorted once by the composite key `key * span + time` (one int64 sort, much faster
+    than a two-key lexsort); the bounds of every (key, window) pair are then found by a single
+    `searchsorted`, and counts/sums are differences of positions and of one cumulative sum.
+    Returns the distinct keys and a dict of columns."""
+    key_codes, unique_keys = pd.factorize(keys, sort=True)
+    times = np.asarray(times, dtype="datetime64[s]").astype(np.int64)
+    as_of = np.datetime64(as_of, "s").astype(np.int64)
+
+    # Shift times so every window start is >= 0; `span` keeps keys from overlapping in the composite key
+    base = min(times.min(), as_of - max(windows_days) * SECONDS_PER_DAY)
+    span = max(times.max(), as_of) - base + 1
+    composite = key_codes.astype(np.int64) * span + (times - base)
+    order = np.argsort(composite)
+    composite = composite[order]
+    key_codes, times = composite // span, composite % span + base
+    cumulative = np.concatenate([[0.0], np.cumsum(np.nan_to_num(np.asarray(values, dtype="float64")[order]))]) if values is not None else None
+
+    key_offsets = np.arange(len(unique_keys), dtype=np.int64)[:, np.newaxis] * span
+    bounds = np.array([as_of - days * SECONDS_PER_DAY for days in windows_days] + [as_of]) - base
+    positions = np.searchsorted(composite, (key_offsets + bounds).ravel(), side="right").reshape(len(unique_keys), -1)
+    end = positions[:, -1]  # One past the last event at or before as_of
+
+    columns = {}
+    for index, days in enumerate(windows_days):
+        start = positions[:, index]
+        columns[f"count_{days}d"] = end - start
+        if cumulative is not None:
+            columns[f"amount_{days}d"] = cumulative[end] - cumulative[start]
+
+    # Recency of the last event at or before as_of (NaN when the key has none)
+    key_start = np.searchsorted(key_codes, np.arange(len(unique_keys)))
+    has_event = end > key_start
+    last_time = times[np.maximum(end - 1, 0)]
+    columns["days_since_last"] = np.where(has_event, (as_of - last_time) / SECONDS_PER_DAY, np.nan)
+    return unique_keys, columns
+
+def add_trends(columns, short_days=TREND_WINDOWS[0], long_days=TREND_WINDOWS[1]):
+    """Recent activity minus the long-run rate scaled to the short window (> 0 = accelerating)."""
+    for measure in ("count", "amount"):
+        if f"{measure}_{short_days}d" in columns:
+            columns[f"{measure}_trend_{short_days}_{long_days}"] = (
+                columns[f"{measure}_{short_days}d"] - columns[f"{measure}_{long_days}d"] * short_days / long_days
+            )
+    return columns
+
+def _bucket_of(keys, n_buckets):
+    return (pd.util.hash_pandas_object(keys.astype(str), index=False).to_numpy() % n_buckets).astype(int)
+
+def _spill_partition(task, staging_dir, n_buckets):
+    """Pass 1 worker: splits one row group of an event log into customer hash buckets; returns its newest event."""
+    source, part_index, partition = task
+    value = EVENT_SOURCES[source]["value"]
+    df = read_partition(partition, columns=[ENTITY_COLUMN, TIME_COLUMN] + ([value] if value else []))
+    df[ENTITY_COLUMN] = df[ENTITY_COLUMN].astype(str)
+    buckets = _bucket_of(df[ENTITY_COLUMN], n_buckets)
+    for bucket in np.unique(buckets):
+        bucket_dir = os.path.join(staging_dir, SPILL_DIR, source, f"bucket={bucket}")
+        os.makedirs(bucket_dir, exist_ok=True)
+        df[buckets == bucket].to_parquet(os.path.join(bucket_dir, f"part-{part_index:05d}.parquet"), index=False)
+    return df[TIME_COLUMN].max() if len(df) else None
+
+def _aggregate_bucket(bucket, staging_dir, sources, as_of):
+    """Pass 2 worker: windowed features of every customer in one bucket (all of their events are local)."""
+    frames = []
+    for source in sources:
+        bucket_dir = os.path.join(staging_dir, SPILL_DIR, source, f"bucket={bucket}")
+        if not os.path.isdir(bucket_dir):
+            continue
+        events = pd.read_parquet(bucket_dir)
+        value = EVENT_SOURCES[source]["value"]
+        keys, columns = window_aggregates(
+            events[ENTITY_COLUMN].to_numpy(), events[TIME_COLUMN].to_numpy(), events[value].to_numpy() if value else None, as_of
+        )
+        frames.append(pd.DataFrame(add_trends(columns), index=pd.Index(keys, name=ENTITY_COLUMN)).add_prefix(f"{source}_"))
+    if not frames:
+        return None
+    features = pd.concat(frames, axis=1).reset_index()
+    part_path = os.path.join(staging_dir, f"part-{bucket:05d}.parquet")
+    features.to_parquet(part_path, index=False)
+    return part_path
+
+def compute_event_features(output_dir=EVENT_FEATURES_DIR, as_of=AS_OF, n_buckets=N_BUCKETS, n_workers=N_WORKERS):
+    """Windowed per-customer features from every event log found, computed bucket by bucket.
+
+    Pass 1 hash-partitions the event row groups by customer into spill files (parallel, bounded
+    memory per task); pass 2 aggregates each bucket independently. The result is staged and swapped
+    in when complete. Returns the output path, or None (and removes old output) without event logs."""
+    sources = [source for source, config in EVENT_SOURCES.items() if os.path.exists(config["path"])]
+    staging_dir = output_dir.rstrip("/") + ".staging"
+    reset_output(staging_dir)
+    if not sources:
+        reset_output(output_dir)  # Preparation then falls back to the snapshot proxies
+        logging.info("✅ No event logs found; event features skipped.")
+        print("✅ No event logs found; event features skipped.")
+        return None
+
+    tasks = [(source, index, partition) for source in sources for index, partition in enumerate(list_partitions(EVENT_SOURCES[source]["path"]))]
+    logging.info(f"✅ Spilling {len(tasks)} event partitions into {n_buckets} buckets with {n_workers} workers")
+    newest = run_partitioned(_spill_partition, tasks, n_workers, staging_dir=staging_dir, n_buckets=n_buckets)
+    as_of = pd.Timestamp(as_of) if as_of else max(time for time in newest if time is not None)
+    part_paths = run_partitioned(_aggregate_bucket, list(range(n_buckets)), n_workers, staging_dir=staging_dir, sources=sources, as_of=as_of)
+    shutil.rmtree(os.path.join(staging_dir, SPILL_DIR))
+
+    reset_output(output_dir)
+    os.replace(staging_dir, output_dir)
+    logging.info(f"📂 Event features as of {as_of} saved: {output_dir} ({sum(path is not None for path in part_paths)} parts)")
+    print(f"✅ Event features as of {as_of} saved at: {output_dir}")
+    return output_dir
+
+@functools.lru_cache(maxsize=1)
+def load_event_features(path=EVENT_FEATURES_DIR):
+    """Event features indexed by customer (cached per process); None when they were not computed."""
+    if not os.path.isdir(path) or not any(name.endswith(".parquet") for name in os.listdir(path)):
+        return None
+    features = pd.read_parquet(path)
+    features[ENTITY_COLUMN] = features[ENTITY_COLUMN].astype(str)
+    return features.set_index(ENTITY_COLUMN)
+
+def attach_event_features(df, path=EVENT_FEATURES_DIR):
+    """Joins event features onto snapshot rows by customer. Customers without events get zero
+    activity and a recency capped at the longest window; `high_support_calls` comes from support events."""
+    features = load_event_features(path)
+    if features is None or ENTITY_COLUMN not in df.columns:
+        return df
+    joined = features.reindex(df[ENTITY_COLUMN].astype(str).to_numpy())
+    joined.index = df.index
+    df = pd.concat([df, joined], axis=1)
+    for col in features.columns:
+        if col.endswith("days_since_last"):
+            df[col] = df[col].fillna(max(WINDOWS_DAYS)).clip(upper=max(WINDOWS_DAYS))
+        else:
+            df[col] = df[col].fillna(0.0)
+    if "support_count_90d" in df.columns:
+        df["high_support_calls"] = (df["support_count_90d"] >= HIGH_SUPPORT_CALLS).astype("int64")
+    return df
+
+def main():
+    setup_logging("event_features.log")
+    compute_event_features()
+
+if __name__ == "__main__":
+    main()
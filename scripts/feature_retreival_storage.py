@@ -1,63 +1,54 @@
-import pyodbc
 import pandas as pd
 import os
 import datetime
+from .runtime import ensure_dirs
+from . import feature_store, offline_feature_store
 
 # ✅ Define Paths
 FEATURE_DIR = "data/features/"
-os.makedirs(FEATURE_DIR, exist_ok=True)
 
 # ✅ Database Connection Function
 def get_db_connection():
-    """Establishes a connection to SQL Server."""
+    """Establishes a connection to SQL Server (or the SQLite stand-in)."""
     try:
-        conn = pyodbc.connect(
-            'DRIVER={ODBC Driver 17 for SQL Server};'
-            'SERVER=192.168.29.40;'
-            'DATABASE=PG;'
-            'UID=bits;'
-            'PWD=mnblkj147'
-        )
-        return conn
+        return feature_store.get_db_connection()
     except Exception as e:
         print(f"❌ Database Connection Error: {str(e)}")
         return None
 
 # ✅ Fetch All Features
 def fetch_all_features():
-    """Retrieves all features from FeatureStore for model training."""
+    """Retrieves the latest published feature version from FeatureStore for model training
+    (every feature listed in the version's metadata, keyed by customer; the encoding vocabularies keep the set stable)."""
     conn = get_db_connection()
     if not conn:
         return None
+    version = feature_store.latest_feature_version(conn)
+    if version is None:
+        conn.close()
+        print("❌ No published feature version found.")
+        return None
+    columns = feature_store.published_feature_columns(conn, version)
 
-    query = """
-    SELECT 
-      [gender]
-      ,[SeniorCitizen]
-      ,[Partner]
-      ,[Dependents]
-      ,[tenure]
-      ,[PhoneService]
-      ,[Churn]
-      ,[MultipleLines_No phone service]
-      ,[MultipleLines_Yes]
-      ,[InternetService_Fiber optic]
-      ,[InternetService_No]
-      ,[OnlineSecurity_No internet service]
-      ,[OnlineSecurity_Yes]
-      ,[OnlineBackup_No internet service]
-      ,[OnlineBackup_Yes]
-      ,[last_purchase_recency]
-      ,[engagement_score]
-      ,[total_services_used]
-      ,[high_support_calls]
-    FROM FeatureStore ORDER BY CreatedAt DESC;
+    query = f"""
+    SELECT EntityID AS [{feature_store.ENTITY_COLUMN}], {', '.join(f'[{col}]' for col in columns)}
+    FROM FeatureStore WHERE FeatureVersion = ? ORDER BY EntityID;
     """
 
-    df = pd.read_sql(query, conn)
+    df = pd.read_sql(query, conn, params=(version,))
     conn.close()
     return df
 
+def fetch_offline_features(columns=None, filters=None):
+    """Retrieves the latest offline feature version (Parquet backend, no database); all of its features by default."""
+    try:
+        columns = ["EntityID"] + (columns or offline_feature_store.version_columns())
+        df = offline_feature_store.read_features(columns=columns, filters=filters)
+        return df.rename(columns={"EntityID": feature_store.ENTITY_COLUMN})
+    except FileNotFoundError as e:
+        print(str(e))
+        return None
+
 # ✅ Store Features in Parquet
 def store_features(df):
     """Stores retrieved features as a Parquet file with versioning."""
@@ -68,8 +59,9 @@ def store_features(df):
     print(f"✅ Features stored at: {feature_file_path}")
     return feature_file_path
 
-if __name__ == "__main__":
-    df_all = fetch_all_features()
+def main():
+    ensure_dirs(FEATURE_DIR)
+    df_all = fetch_offline_features() if feature_store.FEATURE_STORE_BACKEND == "parquet" else fetch_all_features()
     if df_all is not None:
         print("✅ Retrieved All Features for Model Training:")
         print(df_all.head())  # Print first 5 rows
@@ -77,3 +69,6 @@ if __name__ == "__main__":
         # ✅ Store Retrieved Features
         stored_path = store_features(df_all)
         print(f"📂 Features saved as Parquet: {stored_path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,94 @@
 import pandas as pd
-import pyodbc
 import os
 import logging
 from datetime import datetime
- 
-# ✅ Configure Logging
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-logging.basicConfig(
-    filename=os.path.join(LOG_DIR, "feature_store.log"),
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
- 
+from .runtime import setup_logging
+from .partitioning import list_partitions, read_partition
+from .checkpoint import Checkpoint, frame_fingerprint
+from . import offline_feature_store
+
 # ✅ Define Paths
 PARQUET_DIR = "data/transformed/"
 DB_SERVER = "192.168.29.40"
 DB_NAME = "PG"
 DB_USER = "bits"
 DB_PASSWORD = "mnblkj147"
- 
-def get_db_connection():
+FEATURE_STORE_BACKEND = os.environ.get("FEATURE_STORE_BACKEND", "sql")  # "parquet" = offline store, no database
+DB_DIALECT = os.environ.get("FEATURE_STORE_DB", "mssql")  # "sqlite" = local stand-in for SQL Server
+SQLITE_PATH = os.environ.get("FEATURE_STORE_SQLITE_PATH", "data/feature_store.db")
+
+# ✅ Feature Store Settings
+FEATURE_TABLE = "FeatureStore"
+METADATA_TABLE = "FeatureMetadata"
+ENTITY_COLUMN = "customerID"  # Entity key (stored as EntityID); kept by preparation, synthetic IDs for SMOTE rows
+RETENTION_VERSIONS = int(os.environ.get("FEATURE_STORE_RETENTION_VERSIONS", 3))  # Published versions kept
+UPSERT_BATCH_ROWS = 10_000  # Rows per executemany call into the staging table
+CHUNK_ROWS = int(os.environ.get("FEATURE_STORE_CHUNK_ROWS", 50_000))  # Rows per committed (checkpointed) chunk
+FEATURE_SOURCE = "Data Transformation Pipeline"
+
+FEATURE_DESCRIPTIONS = {
+    "Churn": "Indicates whether the customer churned (1) or not (0).",
+    "Dependents": "Indicates if the customer has dependents (1) or not (0).",
+    "engagement_score": "Numerical score representing customer engagement.",
+    "gender": "Gender of the customer (0 for Female, 1 for Male).",
+    "high_support_calls": "Flag if the customer made excessive support calls.",
+    "InternetService_Fiber optic": "Indicates if the customer has fiber optic internet.",
+    "InternetService_No": "Indicates if the customer has no internet service.",
+    "last_purchase_recency": "Days since the last purchase by the customer.",
+    "MultipleLines_No phone service": "Indicates if the customer has no phone service.",
+    "MultipleLines_Yes": "Indicates if the customer has multiple lines.",
+    "OnlineBackup_No internet service": "Indicates if the customer has no internet and no backup service.",
+    "OnlineBackup_Yes": "Indicates if the customer has an online backup service.",
+    "OnlineSecurity_No internet service": "Indicates if the customer has no internet and no security service.",
+    "OnlineSecurity_Yes": "Indicates if the customer has an online security service.",
+    "Partner": "Indicates if the customer has a partner (1) or not (0).",
+    "PhoneService": "Indicates if the customer has a phone service (1) or not (0).",
+    "SeniorCitizen": "Indicates if the customer is a senior citizen (1) or not (0).",
+    "tenure": "Number of months the customer has stayed with the company.",
+    "total_services_used": "Count of total services used by the customer."
+}
+
+# ✅ SQL Dialects (both drivers use qmark parameters and accept [bracketed] identifiers)
+DIALECTS = {
+    "mssql": {
+        "float": "FLOAT",
+        "text": "NVARCHAR(255)",
+        "long_text": "NVARCHAR(1000)",
+        "created_at": "DATETIME DEFAULT GETDATE()",
+        "columns": "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ? ORDER BY ORDINAL_POSITION",
+        "staging_name": "#{table}Staging",
+        "create_staging": "SELECT TOP 0 {columns} INTO {staging} FROM {table}",
+        "upsert": (
+            "MERGE {table} WITH (HOLDLOCK) AS target USING {staging} AS source ON {match} "
+            "WHEN MATCHED THEN UPDATE SET {update} "
+            "WHEN NOT MATCHED THEN INSERT ({columns}) VALUES ({source_columns});"
+        ),
+        "update_column": "target.{column} = source.{column}",
+    },
+    "sqlite": {
+        "float": "REAL",
+        "text": "TEXT",
+        "long_text": "TEXT",
+        "created_at": "TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
+        "columns": "SELECT name FROM pragma_table_info(?)",
+        "staging_name": "{table}Staging",
+        "create_staging": "CREATE TEMP TABLE {staging} AS SELECT {columns} FROM {table} WHERE 0",
+        "upsert": (
+            "INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} WHERE true "
+            "ON CONFLICT ({keys}) DO UPDATE SET {update}"
+        ),
+        "update_column": "{column} = excluded.{column}",
+    },
+}
+
+def get_db_connection(dialect=DB_DIALECT):
+    """Connects to SQL Server (or the SQLite stand-in)."""
+    if dialect == "sqlite":
+        import sqlite3
+
+        return sqlite3.connect(SQLITE_PATH)
+    import pyodbc
+
     conn = pyodbc.connect(
         f'DRIVER={{ODBC Driver 17 for SQL Server}};'
         f'SERVER={DB_SERVER};'
@@ -29,119 +97,227 @@ def get_db_connection():
         f'PWD={DB_PASSWORD}'
     )
     return conn
- 
-def load_transformed_data():
-    """Loads the latest transformed Parquet file."""
+
+def get_latest_transformed_path():
+    """Finds the latest transformed Parquet file/dataset."""
     transformed_files = sorted(os.listdir(PARQUET_DIR), reverse=True)
     if not transformed_files:
         raise FileNotFoundError("❌ No transformed Parquet files found!")
- 
-    latest_transformed_file = os.path.join(PARQUET_DIR, transformed_files[0])
+    return os.path.join(PARQUET_DIR, transformed_files[0])
+
+def load_transformed_data():
+    """Loads the latest transformed Parquet file."""
+    latest_transformed_file = get_latest_transformed_path()
     logging.info(f"✅ Loading transformed data from: {latest_transformed_file}")
     print(f"✅ Loading transformed data from: {latest_transformed_file}")
- 
+
     df = pd.read_parquet(latest_transformed_file)
     return df
- 
-def create_feature_store_tables(df):
-    """Creates Feature Store Table and Metadata Table in SQL Server."""
-    conn = get_db_connection()
+
+def _quote(column):
+    return f"[{column}]"
+
+def _column_type(series, dialect):
+    return DIALECTS[dialect]["float"] if pd.api.types.is_numeric_dtype(series) else DIALECTS[dialect]["text"]
+
+def get_table_columns(conn, table, dialect=DB_DIALECT):
+    """Existing columns of a table (empty if the table does not exist)."""
+    cursor = conn.cursor()
+    cursor.execute(DIALECTS[dialect]["columns"], (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+def entity_ids(df):
+    """Entity key per row (the customer ID), so versions and scores join by customer."""
+    if ENTITY_COLUMN not in df.columns:
+        raise ValueError(f"❌ Entity key '{ENTITY_COLUMN}' missing; data prepared before it was kept must be prepared again.")
+    return df[ENTITY_COLUMN].astype(str)
+
+def feature_columns(df):
+    """Columns stored as features (the entity key lives in EntityID)."""
+    return [col for col in df.columns if col != ENTITY_COLUMN]
+
+def create_feature_store_tables(conn, df, dialect=DB_DIALECT):
+    """Creates the Feature Store and Metadata tables if missing; adds new feature columns (schema evolution)."""
+    types = DIALECTS[dialect]
     cursor = conn.cursor()
- 
-    # Drop old tables if exist (for fresh inserts)
-    cursor.execute("IF OBJECT_ID('FeatureStore', 'U') IS NOT NULL DROP TABLE FeatureStore;")
-    cursor.execute("IF OBJECT_ID('FeatureMetadata', 'U') IS NOT NULL DROP TABLE FeatureMetadata;")
+    existing_columns = get_table_columns(conn, FEATURE_TABLE, dialect)
+
+    # Tables written by the old drop-and-recreate job have no version key: replace them once
+    if existing_columns and "FeatureVersion" not in existing_columns:
+        logging.warning("⚠️ Replacing unversioned FeatureStore/FeatureMetadata tables.")
+        cursor.execute(f"DROP TABLE {FEATURE_TABLE}")
+        if get_table_columns(conn, METADATA_TABLE, dialect):
+            cursor.execute(f"DROP TABLE {METADATA_TABLE}")
+        existing_columns = []
+
+    column_definitions = {col: f"{_quote(col)} {_column_type(df[col], dialect)}" for col in feature_columns(df)}
+    if not existing_columns:
+        cursor.execute(f"""
+        CREATE TABLE {FEATURE_TABLE} (
+            EntityID {types['text']} NOT NULL,
+            FeatureVersion INT NOT NULL,
+            {', '.join(column_definitions.values())},
+            CreatedAt {types['created_at']},
+            PRIMARY KEY (EntityID, FeatureVersion)
+        );
+        """)
+    else:
+        for col in [col for col in column_definitions if col not in existing_columns]:
+            cursor.execute(f"ALTER TABLE {FEATURE_TABLE} ADD {column_definitions[col]}")
+            logging.info(f"✅ Added feature column: {col}")
+
+    if not get_table_columns(conn, METADATA_TABLE, dialect):
+        cursor.execute(f"""
+        CREATE TABLE {METADATA_TABLE} (
+            FeatureName {types['text']} NOT NULL,
+            Version INT NOT NULL,
+            Description {types['long_text']},
+            Source {types['text']},
+            CreatedAt {types['created_at']},
+            PRIMARY KEY (FeatureName, Version)
+        );
+        """)
     conn.commit()
- 
-    # Generate Feature Store Table Schema
-    column_definitions = [f"[{col}] FLOAT" if df[col].dtype in ["float64", "int64"] else f"[{col}] NVARCHAR(255)" for col in df.columns]
-    create_table_sql = f"""
-    CREATE TABLE FeatureStore (
-        FeatureID INT IDENTITY(1,1) PRIMARY KEY,
-        {', '.join(column_definitions)},
-        CreatedAt DATETIME DEFAULT GETDATE(),
-        Version INT
-    );
-    """
-    # Create Feature Metadata Table
-    create_metadata_sql = """
-    CREATE TABLE FeatureMetadata (
-        FeatureName NVARCHAR(255) PRIMARY KEY,
-        Description NVARCHAR(1000),
-        Source NVARCHAR(255),
-        Version INT DEFAULT 1,
-        CreatedAt DATETIME DEFAULT GETDATE()
-    );
-    """
-    cursor.execute(create_table_sql)
-    cursor.execute(create_metadata_sql)
+
+    logging.info("✅ Feature Store & Metadata Tables Ready.")
+    print("✅ Feature Store & Metadata Tables Ready.")
+
+def latest_feature_version(conn):
+    """Newest published version (metadata is written last, so it marks a complete version)."""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT MAX(Version) FROM {METADATA_TABLE}")
+    return cursor.fetchone()[0]
+
+def published_feature_columns(conn, version, dialect=DB_DIALECT):
+    """Feature columns of a published version, from its metadata rows (in table column order)."""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT FeatureName FROM {METADATA_TABLE} WHERE Version = ?", (version,))
+    names = {row[0] for row in cursor.fetchall()}
+    return [col for col in get_table_columns(conn, FEATURE_TABLE, dialect) if col in names]
+
+def next_feature_version(conn):
+    """Version number for a new run; an unpublished (failed) version is reused (see `clear_feature_version`)."""
+    return (latest_feature_version(conn) or 0) + 1
+
+def clear_feature_version(conn, version):
+    """Deletes rows left under an unpublished version by a failed run (their keys may not be upserted again)."""
+    cursor = conn.cursor()
+    cursor.execute(f"DELETE FROM {FEATURE_TABLE} WHERE FeatureVersion = ?", (version,))
+    deleted = cursor.rowcount
     conn.commit()
-    conn.close()
- 
-    logging.info("✅ Feature Store & Metadata Tables Created Successfully.")
-    print("✅ Feature Store & Metadata Tables Created Successfully.")
- 
-def store_features(df):
-    """Stores all transformed features dynamically in SQL Server."""
-    conn = get_db_connection()
+    if deleted > 0:
+        logging.info(f"✅ Removed {deleted} rows of unpublished version {version}.")
+    return deleted
+
+def upsert_rows(conn, table, keys, columns, rows, dialect=DB_DIALECT):
+    """Bulk upsert: batched executemany into a staging table, then one set-based MERGE / ON CONFLICT."""
+    sql = DIALECTS[dialect]
+    staging = sql["staging_name"].format(table=table)
+    quoted = [_quote(col) for col in columns]
     cursor = conn.cursor()
- 
-    # Insert Data into FeatureStore
-    column_names = ", ".join([f"[{col}]" for col in df.columns])
-    placeholders = ", ".join(["?" for _ in df.columns])
-    insert_sql = f"INSERT INTO FeatureStore ({column_names}, Version) VALUES ({placeholders}, ?)"
- 
-    for _, row in df.iterrows():
-        cursor.execute(insert_sql, tuple(row) + (1,))
- 
+    if dialect == "mssql":
+        cursor.fast_executemany = True  # Parameter arrays instead of one round-trip per row
+    cursor.execute(sql["create_staging"].format(columns=", ".join(quoted), staging=staging, table=table))
+
+    insert_sql = f"INSERT INTO {staging} ({', '.join(quoted)}) VALUES ({', '.join('?' for _ in columns)})"
+    for start in range(0, len(rows), UPSERT_BATCH_ROWS):
+        cursor.executemany(insert_sql, rows[start:start + UPSERT_BATCH_ROWS])
+
+    cursor.execute(sql["upsert"].format(
+        table=table,
+        staging=staging,
+        columns=", ".join(quoted),
+        source_columns=", ".join(f"source.{col}" for col in quoted),
+        keys=", ".join(_quote(key) for key in keys),
+        match=" AND ".join(f"target.{_quote(key)} = source.{_quote(key)}" for key in keys),
+        update=", ".join(sql["update_column"].format(column=col) for col in quoted if col[1:-1] not in keys),
+    ))
+    cursor.execute(f"DROP TABLE {staging}")
+
+def store_features(conn, df, version, dialect=DB_DIALECT, checkpoint=None, chunk_rows=CHUNK_ROWS):
+    """Upserts one feature version keyed on (EntityID, FeatureVersion) in committed chunks; chunks already
+    recorded in `checkpoint` are skipped (re-upserting a chunk is harmless)."""
+    columns = feature_columns(df)
+    values = df[columns].astype(object).where(df[columns].notna(), None)
+    values.insert(0, "FeatureVersion", version)
+    values.insert(0, "EntityID", entity_ids(df).to_numpy())
+    for chunk, start in enumerate(range(0, len(values), chunk_rows)):
+        if checkpoint is not None and checkpoint.is_done(chunk):
+            continue
+        rows = list(values.iloc[start:start + chunk_rows].itertuples(index=False, name=None))
+        upsert_rows(conn, FEATURE_TABLE, ["EntityID", "FeatureVersion"], list(values.columns), rows, dialect)
+        conn.commit()
+        if checkpoint is not None:
+            checkpoint.commit(chunk)
+
+    logging.info(f"✅ {len(df)} feature rows stored as version {version}.")
+    print(f"✅ {len(df)} feature rows stored as version {version}.")
+
+def store_feature_metadata(conn, df, version, dialect=DB_DIALECT):
+    """Stores metadata for each feature of a version in one batched upsert (publishes the version)."""
+    rows = [
+        (col, version, FEATURE_DESCRIPTIONS.get(col, "No description available."), FEATURE_SOURCE)
+        for col in feature_columns(df)
+    ]
+    upsert_rows(conn, METADATA_TABLE, ["FeatureName", "Version"], ["FeatureName", "Version", "Description", "Source"], rows, dialect)
     conn.commit()
-    conn.close()
- 
-    logging.info("✅ Features successfully stored in SQL Server.")
-    print("✅ Features successfully stored in SQL Server.")
- 
-def store_feature_metadata(df):
-    """Stores metadata for each feature with specific descriptions."""
-    conn = get_db_connection()
+
+    logging.info(f"✅ Feature metadata stored for version {version}.")
+    print(f"✅ Feature metadata stored for version {version}.")
+
+def compact_feature_store(conn, keep_versions=RETENTION_VERSIONS):
+    """Deletes feature rows and metadata of versions older than the newest `keep_versions`."""
+    latest = latest_feature_version(conn)
+    if latest is None:
+        return 0
+    cutoff = latest - keep_versions
     cursor = conn.cursor()
- 
-    feature_descriptions = {
-        "Churn": "Indicates whether the customer churned (1) or not (0).",
-        "Dependents": "Indicates if the customer has dependents (1) or not (0).",
-        "engagement_score": "Numerical score representing customer engagement.",
-        "gender": "Gender of the customer (0 for Female, 1 for Male).",
-        "high_support_calls": "Flag if the customer made excessive support calls.",
-        "InternetService_Fiber optic": "Indicates if the customer has fiber optic internet.",
-        "InternetService_No": "Indicates if the customer has no internet service.",
-        "last_purchase_recency": "Days since the last purchase by the customer.",
-        "MultipleLines_No phone service": "Indicates if the customer has no phone service.",
-        "MultipleLines_Yes": "Indicates if the customer has multiple lines.",
-        "OnlineBackup_No internet service": "Indicates if the customer has no internet and no backup service.",
-        "OnlineBackup_Yes": "Indicates if the customer has an online backup service.",
-        "OnlineSecurity_No internet service": "Indicates if the customer has no internet and no security service.",
-        "OnlineSecurity_Yes": "Indicates if the customer has an online security service.",
-        "Partner": "Indicates if the customer has a partner (1) or not (0).",
-        "PhoneService": "Indicates if the customer has a phone service (1) or not (0).",
-        "SeniorCitizen": "Indicates if the customer is a senior citizen (1) or not (0).",
-        "tenure": "Number of months the customer has stayed with the company.",
-        "total_services_used": "Count of total services used by the customer."
-    }
- 
-    for col in df.columns:
-        description = feature_descriptions.get(col, "No description available.")
-        cursor.execute("""
-            INSERT INTO FeatureMetadata (FeatureName, Description, Source, Version)
-            VALUES (?, ?, ?, ?)
-        """, (col, description, "Data Transformation Pipeline", 1))
- 
+    cursor.execute(f"DELETE FROM {FEATURE_TABLE} WHERE FeatureVersion <= ?", (cutoff,))
+    deleted = cursor.rowcount
+    cursor.execute(f"DELETE FROM {METADATA_TABLE} WHERE Version <= ?", (cutoff,))
     conn.commit()
-    conn.close()
- 
-    logging.info("✅ Feature metadata stored successfully.")
-    print("✅ Feature metadata stored successfully.")
- 
-if __name__ == "__main__":
+    logging.info(f"✅ Compaction removed {deleted} rows of versions <= {cutoff}.")
+    return deleted
+
+def publish_features(conn, df, dialect=DB_DIALECT, chunk_rows=CHUNK_ROWS):
+    """Appends the data as a new feature version; returns the version number.
+
+    A retry after a failure resumes the same version from the checkpoint instead of starting over."""
+    checkpoint = Checkpoint("feature_store", f"{frame_fingerprint(df)}-{chunk_rows}")
+    create_feature_store_tables(conn, df, dialect)
+    version = checkpoint.state.get("version")
+    if version is None:  # Fresh start: nothing of this run is stored yet
+        version = next_feature_version(conn)
+        clear_feature_version(conn, version)
+    checkpoint.commit(version=version)
+    store_features(conn, df, version, dialect, checkpoint, chunk_rows)
+    store_feature_metadata(conn, df, version, dialect)
+    compact_feature_store(conn)
+    checkpoint.clear()
+    return version
+
+def publish_offline_features(source_path):
+    """Parquet backend: streams the transformed partitions into a new offline feature version."""
+    version = offline_feature_store.begin_version()
+    for part_index, partition in enumerate(list_partitions(source_path)):
+        df = read_partition(partition)
+        features = df[feature_columns(df)]
+        features.insert(0, "EntityID", entity_ids(df).to_numpy())
+        offline_feature_store.write_part(features, version, part_index)
+    offline_feature_store.commit_version(version, keep_versions=RETENTION_VERSIONS)
+    return version
+
+def main():
+    setup_logging("feature_store.log")
+    if FEATURE_STORE_BACKEND == "parquet":
+        publish_offline_features(get_latest_transformed_path())
+        return
     df_transformed = load_transformed_data()
-    create_feature_store_tables(df_transformed)
-    store_features(df_transformed)
-    store_feature_metadata(df_transformed)
\ No newline at end of file
+    conn = get_db_connection()
+    try:
+        publish_features(conn, df_transformed)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import os
+import time
+import logging
+import functools
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from .model_registry import MODEL_CACHE_SIZE, load_model, model_slug, resolve_version, version_dir
+from .runtime import get_latest_feature_file, setup_logging
+
+# ✅ Inference Settings
+BATCH_SIZE = 2_048  # Rows traversed together (keeps the rows × trees working set cache-sized)
+COMPACT_EVERY = 4  # Tree levels walked between dropping (row, tree) pairs that reached a leaf
+N_THREADS = int(os.environ.get("INFERENCE_THREADS", 1))  # Threads over row chunks (opt-in; no multi-core benchmark yet)
+FLAT_MAX_ROWS = int(os.environ.get("INFERENCE_FLAT_MAX_ROWS", 2_048))  # Larger frames use sklearn's compiled tree walk
+FLAT_FOREST_DIR = "flat_forest"
+BENCHMARK_BATCH_SIZES = (1, 100, 100_000)
+SCORES_DIR = "data/scores/"
+CHECKPOINT_NAME = "_checkpoint"  # Kept inside the output folder ("_" files are ignored by Parquet readers)
+
+def _sibling_order(children_left, children_right):
+    """Breadth-first node order in which both children of a split node are adjacent (right = left + 1)."""
+    order = [np.zeros(1, dtype=np.intp)]
+    frontier = order[0]
+    while frontier.size:
+        splits = frontier[children_left[frontier] != -1]
+        frontier = np.column_stack([children_left[splits], children_right[splits]]).ravel()
+        order.append(frontier)
+    return np.concatenate(order)
+
+def _float32_thresholds(threshold):
+    """Largest float32 <= each float64 threshold: for float32 inputs, x <= t ⇔ x <= float32 threshold."""
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+class FlatForest:
+    """A fitted RandomForestClassifier flattened into contiguous node arrays.
+
+    All trees share one node table in sibling order (a split's right child is `children + 1`) and
+    leaves loop onto themselves, so a batch of (row, tree) pairs is walked level by level with a
+    handful of vectorized gathers. Predictions match `predict_proba` exactly: inputs are cast to
+    float32 like sklearn, thresholds are rounded down to float32 (same comparisons), and tree
+    probabilities are summed in tree order."""
+
+    ARRAYS = ("feature", "threshold", "children", "missing_left", "values", "roots", "classes")
+    OPTIONAL_ARRAYS = ("feature_names",)  # Absent from forests flattened before it was recorded
+
+    def __init__(self, feature, threshold, children, missing_left, values, roots, classes, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.missing_left = missing_left
+        self.values = values
+        self.roots = roots
+        self.classes = classes
+        self.feature_names = np.asarray([] if feature_names is None else feature_names, dtype=str)
+        self.is_leaf = children == np.arange(children.size)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flattens the estimators of a fitted single-output RandomForestClassifier."""
+        import sklearn
+
+        # sklearn >= 1.4 stores class fractions in tree_.value; older versions store (weighted) counts
+        values_are_fractions = tuple(int(part) for part in sklearn.__version__.split(".")[:2]) >= (1, 4)
+        features, thresholds, children, missing, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            order = _sibling_order(tree.children_left, tree.children_right)
+            new_id = np.empty(tree.node_count, dtype=np.intp)
+            new_id[order] = np.arange(tree.node_count)
+            leaf = tree.children_left[order] == -1
+            features.append(np.where(leaf, 0, tree.feature[order]))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold[order]))
+            children.append(np.where(leaf, np.arange(tree.node_count), new_id[np.where(leaf, 0, tree.children_left[order])]) + offset)
+            missing_left = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8))
+            missing.append(missing_left[order].astype(bool) | leaf)  # Leaves keep NaN rows in place too
+            proba = tree.value[order, 0, : model.n_classes_].astype("float64")
+            if not values_are_fractions:
+                normalizer = proba.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                proba /= normalizer
+            values.append(proba)
+            roots.append(offset)
+            offset += tree.node_count
+        return cls(
+            np.concatenate(features).astype(np.intp),
+            _float32_thresholds(np.concatenate(thresholds)),
+            np.concatenate(children).astype(np.intp),
+            np.concatenate(missing),
+            np.concatenate(values),
+            np.asarray(roots, dtype=np.intp),
+            np.asarray(model.classes_),
+            getattr(model, "feature_names_in_", None),
+        )
+
+    @property
+    def n_trees(self):
+        return self.roots.size
+
+    def _go_right(self, values, nodes):
+        """Split decisions; NaNs follow each node's learned missing-value direction."""
+        go_right = values > np.take(self.threshold, nodes)
+        missing = np.isnan(values)
+        if missing.any():
+            go_right[missing] = ~np.take(self.missing_left, nodes[missing])
+        return go_right
+
+    def apply(self, X):
+        """Leaf node ids with shape (n_trees, n_rows) for a C-contiguous float32 batch."""
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = np.tile(np.arange(n_rows, dtype=np.intp) * n_features, self.n_trees)
+        current = np.repeat(self.roots, n_rows)  # Tree-major: position = tree * n_rows + row
+        leaves, positions = None, None
+        while True:
+            for _ in range(COMPACT_EVERY):
+                cells = np.take(self.feature, current)
+                cells += row_offsets
+                go_right = self._go_right(np.take(flat_X, cells), current)
+                current = np.take(self.children, current)
+                current += go_right
+            if positions is None:
+                leaves = current.copy()
+            else:
+                leaves[positions] = current
+            unfinished = np.flatnonzero(~np.take(self.is_leaf, current))
+            if not unfinished.size:
+                return leaves.reshape(self.n_trees, n_rows)
+            positions = unfinished if positions is None else np.take(positions, unfinished)
+            current = np.take(current, unfinished)
+            row_offsets = np.take(row_offsets, unfinished)
+
+    def _predict_batch(self, X):
+        leaves = self.apply(X)
+        proba = np.zeros((X.shape[0], self.classes.size))
+        for tree_leaves in leaves:
+            proba += np.take(self.values, tree_leaves, axis=0)
+        return proba / self.n_trees
+
+    def predict_proba(self, X, batch_size=BATCH_SIZE, n_threads=N_THREADS):
+        """Class probabilities, identical to `RandomForestClassifier.predict_proba`."""
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+        batches = [X[start:start + batch_size] for start in range(0, X.shape[0], batch_size)]
+        if n_threads <= 1 or len(batches) <= 1:
+            results = [self._predict_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(n_threads, len(batches))) as executor:
+                results = list(executor.map(self._predict_batch, batches))
+        return np.concatenate(results) if results else np.empty((0, self.classes.size))
+
+    def predict(self, X, batch_size=BATCH_SIZE, n_threads=N_THREADS):
+        """Predicted class labels (argmax of the probabilities, like sklearn)."""
+        return self.classes[self.predict_proba(X, batch_size, n_threads).argmax(axis=1)]
+
+    def save(self, directory):
+        """Saves each array as .npy so it can be memory-mapped by every scoring process."""
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS + self.OPTIONAL_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name), allow_pickle=False)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        """Loads saved arrays (read-only memory maps by default)."""
+        arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in cls.ARRAYS]
+        optional = {
+            name: np.load(os.path.join(directory, f"{name}.npy"))
+            for name in cls.OPTIONAL_ARRAYS if os.path.exists(os.path.join(directory, f"{name}.npy"))
+        }
+        return cls(*arrays, **optional)
+
+def save_flat_forest(model, name, version):
+    """Stores the flattened forest next to a registered model version."""
+    path = os.path.join(version_dir(name, version), FLAT_FOREST_DIR)
+    FlatForest.from_sklearn(model).save(path)
+    logging.info(f"📂 Flattened forest saved: {path}")
+    return path
+
+@functools.lru_cache(maxsize=MODEL_CACHE_SIZE)
+def _load_flat_version(name, version):
+    path = os.path.join(version_dir(name, version), FLAT_FOREST_DIR)
+    if not os.path.isdir(path):
+        save_flat_forest(load_model(name, version), name, version)  # Versions registered before flattening existed
+    return FlatForest.load(path)
+
+def load_flat_forest(name="Random Forest", version="production"):
+    """Memory-mapped flattened forest for a registered version (LRU cached per process)."""
+    return _load_flat_version(model_slug(name), resolve_version(name, version))
+
+def score_frame(forest, df, model=None):
+    """Churn probability and predicted label per entity for a frame of features (in the model's training
+    column order; forests flattened before feature names were recorded use the frame's feature columns).
+
+    Frames above FLAT_MAX_ROWS go to `model` (the registered sklearn forest) when given: the flat walk
+    wins on small batches, sklearn's compiled per-tree loop on large ones (same probabilities)."""
+    import pandas as pd
+    from .feature_store import entity_ids, feature_columns
+
+    columns = forest.feature_names.tolist() or [col for col in feature_columns(df) if col not in ("EntityID", "Churn")]
+    if model is not None and len(df) > FLAT_MAX_ROWS:
+        proba = model.predict_proba(df[columns] if hasattr(model, "feature_names_in_") else df[columns].to_numpy(dtype=np.float32))
+    else:
+        proba = forest.predict_proba(df[columns].to_numpy(dtype=np.float32))
+    return pd.DataFrame({
+        "EntityID": entity_ids(df).to_numpy(),
+        "churn_probability": proba[:, list(forest.classes).index(1)],
+        "prediction": forest.classes[proba.argmax(axis=1)],
+    })
+
+def score_dataset(source_path, output_dir, name="Random Forest", version="production"):
+    """Batch scoring with one output part per input row group. Each part is written atomically and
+    checkpointed, so a retry skips the committed parts and resumes at the next one. Row groups larger
+    than FLAT_MAX_ROWS are scored by the registered sklearn model (see `score_frame`)."""
+    from .checkpoint import Checkpoint, file_fingerprint
+    from .partitioning import list_partitions, read_partition, reset_output
+
+    resolved = resolve_version(name, version)
+    forest = load_flat_forest(name, resolved)
+    partitions = list_partitions(source_path)
+    checkpoint = Checkpoint(CHECKPOINT_NAME, f"{file_fingerprint(source_path)}-{resolved}", directory=output_dir)
+    if checkpoint.is_fresh:
+        reset_output(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    rows = checkpoint.state.get("rows", 0)
+    for index in range(checkpoint.next_chunk, len(partitions)):
+        frame = read_partition(partitions[index])
+        model = load_model(name, resolved) if len(frame) > FLAT_MAX_ROWS else None  # LRU cached per process
+        scores = score_frame(forest, frame, model=model)
+        part_path = os.path.join(output_dir, f"part-{index:05d}.parquet")
+        scores.to_parquet(f"{part_path}.tmp", index=False)
+        os.replace(f"{part_path}.tmp", part_path)
+        rows += len(scores)
+        checkpoint.commit(index, rows=rows)
+    checkpoint.clear()
+    logging.info(f"📂 Scored {rows} rows with {name} version {resolved}: {output_dir}")
+    print(f"✅ Scored {rows} rows with {name} version {resolved}: {output_dir}")
+    return output_dir
+
+def score_main():
+    """Scores the latest feature file with the production model into data/scores/<feature file>/."""
+    setup_logging("scoring.log")
+    source_path = get_latest_feature_file()
+    score_dataset(source_path, os.path.join(SCORES_DIR, os.path.basename(source_path).replace(".parquet", "")))
+
+def benchmark(model, X, batch_sizes=BENCHMARK_BATCH_SIZES, repeats=3):
+    """Compares `model.predict_proba` with the flattened forest; returns rows/second per batch size."""
+    flat = FlatForest.from_sklearn(model)
+    results = []
+    for batch_size in batch_sizes:
+        batch = X[np.arange(batch_size) % X.shape[0]]
+        if not np.array_equal(flat.predict_proba(batch), model.predict_proba(batch)):
+            raise AssertionError(f"❌ Flattened forest disagrees with sklearn at batch size {batch_size}")
+        timings = {}
+        for label, predict in (("sklearn", model.predict_proba), ("flat", flat.predict_proba)):
+            best = float("inf")
+            for _ in range(repeats):
+                started = time.perf_counter()
+                predict(batch)
+                best = min(best, time.perf_counter() - started)
+            timings[label] = best
+        results.append({
+            "batch_size": batch_size,
+            "sklearn_rows_per_s": batch_size / timings["sklearn"],
+            "flat_rows_per_s": batch_size / timings["flat"],
+            "speedup": timings["sklearn"] / timings["flat"],
+        })
+        print(f"batch={batch_size:>7}  sklearn={batch_size / timings['sklearn']:>12,.0f} rows/s  "
+              f"flat={batch_size / timings['flat']:>12,.0f} rows/s  speedup={timings['sklearn'] / timings['flat']:.1f}x")
+    return results
+
+def main():
+    """Benchmarks the flattened forest on a churn-sized synthetic dataset."""
+    from sklearn.ensemble import RandomForestClassifier
+
+    # Same forest configuration as data_modeling.train_model on a churn-sized synthetic dataset
+    rng = np.random.default_rng(42)
+    X_bench = rng.random((20_000, 18))
+    y_bench = (X_bench[:, 0] + 0.5 * X_bench[:, 4] + 0.3 * rng.random(20_000) > 0.9).astype(int)
+    forest = RandomForestClassifier(n_estimators=100, random_state=42).fit(X_bench[:16_000], y_bench[:16_000])
+    benchmark(forest, X_bench[16_000:])
+
+if __name__ == "__main__":
+    main()
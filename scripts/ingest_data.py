@@ -3,13 +3,8 @@ import pandas as pd
 import logging
 import time
 import subprocess
- 
-# Configure logging
-logging.basicConfig(
-    filename="logs/ingestion.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+from .runtime import setup_logging
+from .checkpoint import Checkpoint, content_fingerprint
  
 # File paths
 CSV_FILE_PATH = "data/raw/customer_churn.csv"
@@ -18,6 +13,7 @@ KAGGLE_OUTPUT_FOLDER = "data/kaggle_downloads"
 OUTPUT_FOLDER = "data/processed/"
 MAX_RETRIES = 3  # Retry up to 3 times before failing
 RETRY_DELAY = 10  # Wait 10 seconds between retries
+CHUNK_ROWS = int(os.environ.get("INGEST_CHUNK_ROWS", 100_000))  # Rows appended (and checkpointed) at a time
  
 def fetch_data():
     """Fetches data from primary and secondary sources (Kaggle)."""
@@ -37,6 +33,35 @@ def fetch_data():
         print(f"❌ Kaggle dataset download failed: {e}")
         return False
  
+def combine_sources(sources, output_path, chunk_rows=CHUNK_ROWS):
+    """Appends the source CSVs into one CSV in chunks; returns the record count per source.
+ 
+    After each chunk is fsynced, its end offset is checkpointed. A retry truncates the output to the
+    last committed offset (dropping a half-written chunk) and continues with the next chunk. Sources
+    are fingerprinted by content, since every Kaggle fetch re-extracts the CSV with a new mtime."""
+    checkpoint = Checkpoint("ingest_data", f"{content_fingerprint(*sources)}-{chunk_rows}")
+    columns = list(dict.fromkeys(col for source in sources for col in pd.read_csv(source, nrows=0).columns))
+    offset = checkpoint.state.get("offset", 0)
+    record_counts = checkpoint.state.get("record_counts", {source: 0 for source in sources})
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+ 
+    with open(output_path, "r+b" if offset and os.path.exists(output_path) else "wb") as f:
+        f.truncate(offset)
+        f.seek(offset)
+        chunk = 0
+        for source in sources:
+            for df in pd.read_csv(source, chunksize=chunk_rows):
+                if not checkpoint.is_done(chunk):
+                    # Same column union & order as concatenating the full files
+                    f.write(df.reindex(columns=columns).to_csv(index=False, header=f.tell() == 0).encode())
+                    f.flush()
+                    os.fsync(f.fileno())
+                    record_counts[source] += len(df)
+                    checkpoint.commit(chunk, offset=f.tell(), record_counts=record_counts)
+                chunk += 1
+    checkpoint.clear()
+    return record_counts
+ 
 def ingest_data():
     """Reads CSV files from local and Kaggle sources and saves backups."""
     attempts = 0
@@ -47,32 +72,21 @@ def ingest_data():
             if not os.path.exists(CSV_FILE_PATH):
                 raise FileNotFoundError(f"❌ CSV file not found: {CSV_FILE_PATH}")
  
-            # Read primary dataset
-            df_main = pd.read_csv(CSV_FILE_PATH)
-            record_count_main = len(df_main)
-            logging.info(f"✅ Successfully read {record_count_main} records from primary source.")
-            print(f"✅ Successfully read {record_count_main} records from primary source.")
- 
-            # Read Kaggle dataset
+            # Locate Kaggle dataset
             kaggle_files = [f for f in os.listdir(KAGGLE_OUTPUT_FOLDER) if f.endswith(".csv")]
             if not kaggle_files:
                 raise FileNotFoundError("❌ No CSV file found in Kaggle dataset.")
- 
             kaggle_file_path = os.path.join(KAGGLE_OUTPUT_FOLDER, kaggle_files[0])
-            df_kaggle = pd.read_csv(kaggle_file_path)
-            record_count_kaggle = len(df_kaggle)
-            logging.info(f"✅ Successfully read {record_count_kaggle} records from Kaggle dataset.")
-            print(f"✅ Successfully read {record_count_kaggle} records from Kaggle dataset.")
- 
-            # Merge both datasets
-            df_combined = pd.concat([df_main, df_kaggle], ignore_index=True)
-            logging.info(f"✅ Combined dataset now has {len(df_combined)} records.")
-            print(f"✅ Combined dataset now has {len(df_combined)} records.")
  
-            # Save combined data
-            os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+            # Merge both datasets chunk by chunk (a retry resumes after the last committed chunk)
             processed_file = os.path.join(OUTPUT_FOLDER, "customer_churn_cleaned.csv")
-            df_combined.to_csv(processed_file, index=False)
+            record_counts = combine_sources([CSV_FILE_PATH, kaggle_file_path], processed_file)
+            logging.info(f"✅ Successfully read {record_counts[CSV_FILE_PATH]} records from primary source.")
+            print(f"✅ Successfully read {record_counts[CSV_FILE_PATH]} records from primary source.")
+            logging.info(f"✅ Successfully read {record_counts[kaggle_file_path]} records from Kaggle dataset.")
+            print(f"✅ Successfully read {record_counts[kaggle_file_path]} records from Kaggle dataset.")
+            logging.info(f"✅ Combined dataset now has {sum(record_counts.values())} records.")
+            print(f"✅ Combined dataset now has {sum(record_counts.values())} records.")
             logging.info(f"📂 File saved to {processed_file}")
             print(f"📂 File saved to {processed_file}")
  
@@ -88,6 +102,10 @@ def ingest_data():
     logging.critical("❌ Ingestion failed after multiple attempts.")
     raise Exception("❌ Data ingestion failed after multiple attempts.")
  
-if __name__ == "__main__":
+def main():
+    setup_logging("ingestion.log")
     if fetch_data():
-        ingest_data()
\ No newline at end of file
+        ingest_data()
+
+if __name__ == "__main__":
+    main()
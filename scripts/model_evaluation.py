@@ -0,0 +1,148 @@
+import os
+import json
+import numpy as np
+from datetime import datetime
+
+# ✅ Define Paths
+REPORTS_DIR = "reports/"
+
+# ✅ Evaluation Settings
+N_DECILES = 10
+N_CALIBRATION_BINS = 10
+N_BOOTSTRAP = int(os.environ.get("EVAL_N_BOOTSTRAP", 200))
+BOOTSTRAP_MAX_GROUPS = 10_000
+BOOTSTRAP_BATCH_ELEMENTS = 20_000_000  # Resampled counts held in memory per bootstrap batch
+CONFIDENCE_LEVEL = 0.95
+
+def _safe_divide(numerator, denominator):
+    """Element-wise division returning 0 where the denominator is 0 (sklearn's zero_division=0)."""
+    numerator, denominator = np.asarray(numerator, dtype="float64"), np.asarray(denominator, dtype="float64")
+    return np.divide(numerator, denominator, out=np.zeros(np.broadcast(numerator, denominator).shape), where=denominator != 0)
+
+def metrics_from_confusion(tn, fp, fn, tp):
+    """Derives threshold metrics from (possibly batched) confusion matrix cells."""
+    precision = _safe_divide(tp, tp + fp)
+    recall = _safe_divide(tp, tp + fn)
+    return {
+        "accuracy": _safe_divide(tp + tn, tn + fp + fn + tp),
+        "precision": precision,
+        "recall": recall,
+        "f1": _safe_divide(2 * precision * recall, precision + recall),
+        "specificity": _safe_divide(tn, tn + fp),
+    }
+
+def ranking_metrics(tps, fps):
+    """ROC-AUC and PR-AUC (average precision) from cumulative true/false positive counts at each
+    distinct score threshold (descending). Accepts (n_batches, n_thresholds) arrays."""
+    tps, fps = np.atleast_2d(tps).astype("float64"), np.atleast_2d(fps).astype("float64")
+    positives, negatives = tps[:, -1:], fps[:, -1:]
+    tpr = np.hstack([np.zeros((tps.shape[0], 1)), _safe_divide(tps, positives)])
+    fpr = np.hstack([np.zeros((fps.shape[0], 1)), _safe_divide(fps, negatives)])
+    roc_auc = (np.diff(fpr, axis=1) * (tpr[:, 1:] + tpr[:, :-1]) / 2).sum(axis=1)
+    average_precision = (np.diff(tpr, axis=1) * _safe_divide(tps, tps + fps)).sum(axis=1)
+    roc_auc[(positives[:, 0] == 0) | (negatives[:, 0] == 0)] = np.nan
+    average_precision[positives[:, 0] == 0] = np.nan
+    return {"roc_auc": roc_auc, "pr_auc": average_precision}
+
+def lift_table(y_sorted):
+    """Per-decile response, lift and cumulative gain from labels sorted by descending score."""
+    n, positives = y_sorted.size, y_sorted.sum()
+    bounds = np.ceil(np.arange(1, N_DECILES + 1) * n / N_DECILES).astype(np.int64)
+    cumulative_positives = np.cumsum(y_sorted)[np.maximum(bounds - 1, 0)] * (bounds > 0)
+    decile_positives = np.diff(np.r_[0, cumulative_positives])
+    decile_sizes = np.diff(np.r_[0, bounds])
+    base_rate = positives / n if n else 0.0
+    response_rate = _safe_divide(decile_positives, decile_sizes)
+    return [
+        {
+            "decile": k + 1,
+            "rows": int(decile_sizes[k]),
+            "positives": int(decile_positives[k]),
+            "response_rate": float(response_rate[k]),
+            "lift": float(_safe_divide(response_rate[k], base_rate)),
+            "cumulative_gain": float(_safe_divide(cumulative_positives[k], positives)),
+            "cumulative_lift": float(_safe_divide(_safe_divide(cumulative_positives[k], bounds[k]), base_rate)),
+        }
+        for k in range(N_DECILES)
+    ]
+
+def calibration_table(y_true, scores):
+    """Reliability curve over equal-width probability bins plus Brier score and expected calibration error."""
+    bins = np.minimum((scores * N_CALIBRATION_BINS).astype(np.int64), N_CALIBRATION_BINS - 1)
+    counts = np.bincount(bins, minlength=N_CALIBRATION_BINS)
+    mean_predicted = _safe_divide(np.bincount(bins, weights=scores, minlength=N_CALIBRATION_BINS), counts)
+    fraction_positive = _safe_divide(np.bincount(bins, weights=y_true, minlength=N_CALIBRATION_BINS), counts)
+    return {
+        "brier_score": float(np.mean((scores - y_true) ** 2)),
+        "expected_calibration_error": float(np.sum(counts * np.abs(mean_predicted - fraction_positive)) / max(y_true.size, 1)),
+        "bins": [
+            {"bin": k, "rows": int(counts[k]), "mean_predicted": float(mean_predicted[k]), "fraction_positive": float(fraction_positive[k])}
+            for k in range(N_CALIBRATION_BINS)
+        ],
+    }
+
+def bootstrap_intervals(y_sorted, pred_sorted, threshold_idx, n_bootstrap=N_BOOTSTRAP, seed=42):
+    """Percentile confidence intervals from a Poisson bootstrap, evaluated in vectorized batches.
+
+    Rows are collapsed into (score group × confusion cell) counts first: a sum of Poisson(1) row
+    weights is Poisson(count), so resampling the counts is equivalent and independent of row count.
+    Beyond BOOTSTRAP_MAX_GROUPS distinct scores, adjacent groups are merged (AUC error <= 1/groups)."""
+    rng = np.random.default_rng(seed)
+    ends = threshold_idx + 1
+    if ends.size > BOOTSTRAP_MAX_GROUPS:
+        ends = np.unique(ends[np.linspace(0, ends.size - 1, BOOTSTRAP_MAX_GROUPS).astype(np.int64)])
+    starts = np.r_[0, ends[:-1]]
+    cells = 2 * y_sorted + pred_sorted  # 0=tn, 1=fp, 2=fn, 3=tp
+    counts = np.stack([np.add.reduceat((cells == cell).astype(np.int64), starts) for cell in range(4)], axis=1)
+    batch_size = max(1, BOOTSTRAP_BATCH_ELEMENTS // counts.size)
+    samples = {}
+    for start in range(0, n_bootstrap, batch_size):
+        resampled = rng.poisson(counts, size=(min(batch_size, n_bootstrap - start),) + counts.shape)
+        batch = metrics_from_confusion(*resampled.sum(axis=1).T)
+        batch.update(ranking_metrics(
+            np.cumsum(resampled[:, :, 2] + resampled[:, :, 3], axis=1),
+            np.cumsum(resampled[:, :, 0] + resampled[:, :, 1], axis=1),
+        ))
+        for name, values in batch.items():
+            samples.setdefault(name, []).append(values)
+    alpha = (1 - CONFIDENCE_LEVEL) / 2
+    return {
+        name: [float(bound) for bound in np.nanquantile(np.concatenate(values), [alpha, 1 - alpha])]
+        for name, values in samples.items()
+    }
+
+def evaluate_predictions(y_true, y_pred, scores, n_bootstrap=N_BOOTSTRAP, seed=42):
+    """Evaluates binary predictions: one confusion matrix, one score sort, vectorized bootstrap."""
+    y_true = np.asarray(y_true).astype(np.int64)
+    y_pred = np.asarray(y_pred).astype(np.int64)
+    scores = np.asarray(scores, dtype="float64")
+
+    # ✅ Threshold metrics from a single confusion matrix
+    tn, fp, fn, tp = np.bincount(2 * y_true + y_pred, minlength=4)
+    report = {"rows": int(y_true.size), "confusion_matrix": {"tn": int(tn), "fp": int(fp), "fn": int(fn), "tp": int(tp)}}
+    report["metrics"] = {name: float(value) for name, value in metrics_from_confusion(tn, fp, fn, tp).items()}
+
+    # ✅ Ranking metrics, lift & gain from a single sort of the scores
+    order = np.argsort(-scores, kind="mergesort")
+    y_sorted, pred_sorted, scores_sorted = y_true[order], y_pred[order], scores[order]
+    threshold_idx = np.r_[np.flatnonzero(np.diff(scores_sorted)), scores_sorted.size - 1]
+    tps = np.cumsum(y_sorted)[threshold_idx]
+    fps = threshold_idx + 1 - tps
+    report["metrics"].update({name: float(value[0]) for name, value in ranking_metrics(tps, fps).items()})
+    report["lift"] = lift_table(y_sorted)
+    report["calibration"] = calibration_table(y_true, scores)
+
+    # ✅ Bootstrap confidence intervals
+    if n_bootstrap:
+        report["confidence_intervals"] = {"level": CONFIDENCE_LEVEL, "n_bootstrap": n_bootstrap}
+        report["confidence_intervals"].update(bootstrap_intervals(y_sorted, pred_sorted, threshold_idx, n_bootstrap, seed))
+    return report
+
+def save_report(report, model_name):
+    """Writes a versioned JSON report to reports/<model>/<timestamp>.json and returns its path."""
+    report_dir = os.path.join(REPORTS_DIR, model_name.lower().replace(" ", "_"))
+    os.makedirs(report_dir, exist_ok=True)
+    report_path = os.path.join(report_dir, f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    with open(report_path, "w") as f:
+        json.dump(dict(report, model=model_name), f, indent=2)
+    return report_path
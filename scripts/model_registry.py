@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import functools
+from datetime import datetime
+from .runtime import write_json_atomic
+
+# ✅ Define Paths
+REGISTRY_DIR = "models/registry/"
+PRODUCTION_POINTER = "production"
+MODEL_FILE = "model.joblib"
+META_FILE = "meta.json"
+
+# ✅ Loader Settings
+MODEL_CACHE_SIZE = int(os.environ.get("MODEL_CACHE_SIZE", 4))  # Model versions kept per process
+# Plain numpy arrays in the pickle are memory-mapped read-only. sklearn trees copy their node arrays
+# on unpickling (`Tree.__setstate__`), so a loaded RandomForest is private to each process; the
+# flattened forest (`forest_inference.load_flat_forest`, .npy memmaps) is the page-sharing path.
+MMAP_MODE = "r"
+
+def model_slug(name):
+    """Registry folder name of a model (e.g. 'Random Forest' → 'random_forest')."""
+    return name.lower().replace(" ", "_")
+
+def _model_dir(name):
+    return os.path.join(REGISTRY_DIR, model_slug(name))
+
+def _file_hash(path):
+    """SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def register_model(model, name, metadata=None):
+    """Serializes a model once (joblib, uncompressed) and stores it under its content hash.
+
+    Returns the version id. Registering an identical model again returns the existing version."""
+    import joblib
+
+    model_dir = _model_dir(name)
+    os.makedirs(model_dir, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(dir=model_dir, prefix=".staging-")
+    joblib.dump(model, os.path.join(staging_dir, MODEL_FILE))  # Uncompressed → arrays can be mmapped
+    version = _file_hash(os.path.join(staging_dir, MODEL_FILE))[:16]
+    target_dir = os.path.join(model_dir, version)
+    if os.path.exists(target_dir):
+        shutil.rmtree(staging_dir)
+        logging.info(f"✅ {name} version {version} already registered.")
+        return version
+
+    meta = {"name": name, "version": version, "created_at": datetime.now().isoformat(timespec="seconds")}
+    meta.update(metadata or {})
+    write_json_atomic(os.path.join(staging_dir, META_FILE), meta, indent=2, default=str)
+    os.replace(staging_dir, target_dir)
+    logging.info(f"📂 Registered {name} version {version}: {target_dir}")
+    return version
+
+def version_dir(name, version):
+    """Folder holding the artifacts of a model version."""
+    return os.path.join(_model_dir(name), version)
+
+def get_metadata(name, version):
+    """Metadata recorded when the version was registered."""
+    with open(os.path.join(version_dir(name, version), META_FILE)) as f:
+        return json.load(f)
+
+def list_versions(name):
+    """All registered versions of a model, oldest first."""
+    model_dir = _model_dir(name)
+    if not os.path.isdir(model_dir):
+        return []
+    versions = [v for v in os.listdir(model_dir) if os.path.exists(os.path.join(model_dir, v, META_FILE))]
+    return sorted(versions, key=lambda v: get_metadata(name, v)["created_at"])
+
+def get_production_version(name):
+    """Version the production pointer refers to (None if nothing was promoted)."""
+    pointer_path = os.path.join(_model_dir(name), PRODUCTION_POINTER)
+    if not os.path.exists(pointer_path):
+        return None
+    with open(pointer_path) as f:
+        return json.load(f)["version"]
+
+def promote(name, version):
+    """Points production at a registered version (atomic pointer swap)."""
+    if not os.path.isdir(version_dir(name, version)):
+        raise FileNotFoundError(f"❌ {name} version {version} is not registered.")
+    write_json_atomic(
+        os.path.join(_model_dir(name), PRODUCTION_POINTER),
+        {"version": version, "promoted_at": datetime.now().isoformat(timespec="seconds")},
+        indent=2,
+    )
+    logging.info(f"🚀 Promoted {name} version {version} to production.")
+    print(f"🚀 Promoted {name} version {version} to production.")
+
+def promote_if_better(name, version, metric="f1"):
+    """Promotes a version when nothing is in production or it matches/beats production on `metric`."""
+    production = get_production_version(name)
+    if production is not None:
+        current = get_metadata(name, production).get("metrics", {}).get(metric, float("-inf"))
+        candidate = get_metadata(name, version).get("metrics", {}).get(metric, float("-inf"))
+        if candidate < current:
+            logging.info(f"✅ Kept {name} production version {production} ({metric} {current:.4f} > {candidate:.4f}).")
+            return False
+    promote(name, version)
+    return True
+
+def resolve_version(name, version=PRODUCTION_POINTER):
+    """Resolves 'production' / 'latest' / explicit version ids."""
+    if version == PRODUCTION_POINTER:
+        resolved = get_production_version(name)
+    elif version == "latest":
+        versions = list_versions(name)
+        resolved = versions[-1] if versions else None
+    else:
+        resolved = version
+    if resolved is None:
+        raise FileNotFoundError(f"❌ No '{version}' version registered for {name}.")
+    return resolved
+
+@functools.lru_cache(maxsize=MODEL_CACHE_SIZE)
+def _load_version(name, version):
+    """Loads one immutable version; cached per process (LRU)."""
+    import joblib
+
+    logging.info(f"✅ Loading {name} version {version}")
+    return joblib.load(os.path.join(version_dir(name, version), MODEL_FILE), mmap_mode=MMAP_MODE)
+
+def load_model(name, version=PRODUCTION_POINTER):
+    """Loads a model version on first use; the pointer is re-read each call, the artifact is cached."""
+    return _load_version(model_slug(name), resolve_version(name, version))
+
+def main(command, model_name, version=None):
+    """Registry CLI: `list <model>` | `promote <model> <version>`."""
+    if command == "list":
+        production_version = get_production_version(model_name)
+        for registered in list_versions(model_name):
+            marker = " (production)" if registered == production_version else ""
+            print(f"{registered}{marker}: {get_metadata(model_name, registered)}")
+    elif command == "promote":
+        promote(model_name, version)
+
+if __name__ == "__main__":
+    main(*sys.argv[1:4])
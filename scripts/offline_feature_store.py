@@ -0,0 +1,119 @@
+import os
+import json
+import shutil
+import logging
+from datetime import datetime
+from .runtime import write_json_atomic
+
+# ✅ Define Paths
+OFFLINE_STORE_DIR = "data/feature_store/features/"
+INDEX_FILE = "_index.json"  # Leading "_" keeps it (and staging folders) out of dataset discovery
+PARTITION_KEY = "feature_version"
+STAGING_PREFIX = "_staging-"
+
+def _version_dir(version, root=OFFLINE_STORE_DIR):
+    return os.path.join(root, f"{PARTITION_KEY}={version}")
+
+def _staging_dir(version, root=OFFLINE_STORE_DIR):
+    return os.path.join(root, f"{STAGING_PREFIX}{PARTITION_KEY}={version}")
+
+def load_index(root=OFFLINE_STORE_DIR):
+    """Metadata index: committed versions with row counts, schema and part counts."""
+    index_path = os.path.join(root, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return {"latest": None, "versions": {}}
+    with open(index_path) as f:
+        return json.load(f)
+
+def _save_index(index, root=OFFLINE_STORE_DIR):
+    """Replaces the index atomically (readers see the old or the new version list)."""
+    write_json_atomic(os.path.join(root, INDEX_FILE), index, indent=2)
+
+def begin_version(root=OFFLINE_STORE_DIR):
+    """Starts a new feature version in a staging folder (invisible to readers); returns its number."""
+    os.makedirs(root, exist_ok=True)
+    index = load_index(root)
+    version = max([int(v) for v in index["versions"]] + [0]) + 1
+    # Left behind by a failed run: a staging folder, or a version folder renamed before the index update
+    for leftover in (_staging_dir(version, root), _version_dir(version, root)):
+        if os.path.exists(leftover):
+            shutil.rmtree(leftover)
+    os.makedirs(_staging_dir(version, root))
+    return version
+
+def write_part(df, version, part_index, root=OFFLINE_STORE_DIR):
+    """Writes one part of a staged version as `part-XXXXX.parquet`."""
+    part_path = os.path.join(_staging_dir(version, root), f"part-{part_index:05d}.parquet")
+    df.to_parquet(part_path, index=False)
+    return part_path
+
+def commit_version(version, root=OFFLINE_STORE_DIR, keep_versions=None):
+    """Publishes a staged version (folder rename + index update), then drops versions beyond `keep_versions`.
+    An empty staged version is refused (ValueError) and stays unpublished."""
+    import pyarrow.dataset as ds
+
+    staging_dir = _staging_dir(version, root)
+    dataset = ds.dataset(staging_dir, format="parquet")
+    if not dataset.files or dataset.count_rows() == 0:
+        # Publishing it would make an empty version `latest` and let retention drop a good one
+        raise ValueError(f"❌ Staged feature version {version} has no rows ({len(dataset.files)} parts); not committed.")
+    entry = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "rows": dataset.count_rows(),
+        "parts": len(dataset.files),
+        "columns": {field.name: str(field.type) for field in dataset.schema},
+    }
+    index = load_index(root)
+    if str(version) not in index["versions"] and os.path.exists(_version_dir(version, root)):
+        shutil.rmtree(_version_dir(version, root))  # Unindexed leftover of a run that died mid-commit
+    os.replace(staging_dir, _version_dir(version, root))
+
+    index["versions"][str(version)] = entry
+    index["latest"] = version
+    if keep_versions:
+        for old_version in sorted(int(v) for v in index["versions"])[:-keep_versions]:
+            del index["versions"][str(old_version)]
+    _save_index(index, root)
+
+    # Old folders are removed only after the index stopped listing them
+    for name in os.listdir(root):
+        if name.startswith(f"{PARTITION_KEY}=") and name.split("=", 1)[1] not in index["versions"]:
+            shutil.rmtree(os.path.join(root, name))
+
+    logging.info(f"📂 Offline feature version {version} committed ({entry['rows']} rows, {entry['parts']} parts).")
+    print(f"✅ Offline feature version {version} committed ({entry['rows']} rows).")
+    return entry
+
+def latest_version(root=OFFLINE_STORE_DIR):
+    """Newest committed version (None if nothing was committed)."""
+    return load_index(root)["latest"]
+
+def version_columns(version="latest", root=OFFLINE_STORE_DIR):
+    """Feature columns of a committed version, from the index (EntityID excluded)."""
+    index = load_index(root)
+    if version == "latest":
+        version = index["latest"]
+    if version is None or str(version) not in index["versions"]:
+        raise FileNotFoundError(f"❌ Offline feature version not found: {version}")
+    return [col for col in index["versions"][str(version)]["columns"] if col != "EntityID"]
+
+def _filter_expression(filters):
+    """Accepts a pyarrow expression or DNF tuples like [("tenure", ">", 0.5)]."""
+    import pyarrow.parquet as pq
+
+    if filters is None or not isinstance(filters, list):
+        return filters
+    return pq.filters_to_expression(filters)
+
+def read_features(version="latest", columns=None, filters=None, root=OFFLINE_STORE_DIR):
+    """Reads one feature version: only its partition folder is scanned, `columns` are projected and
+    `filters` are pushed down to Parquet row-group statistics."""
+    import pyarrow.dataset as ds
+
+    if version == "latest":
+        version = latest_version(root)
+    if version is None or str(version) not in load_index(root)["versions"]:
+        raise FileNotFoundError(f"❌ Offline feature version not found: {version}")
+
+    dataset = ds.dataset(_version_dir(version, root), format="parquet")
+    return dataset.to_table(columns=columns, filter=_filter_expression(filters)).to_pandas()
@@ -0,0 +1,51 @@
+import os
+import shutil
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+# ✅ Parallelism Settings (override per run via environment)
+N_WORKERS = int(os.environ.get("PIPELINE_WORKERS", os.cpu_count() or 1))
+PARTITION_ROWS = int(os.environ.get("PIPELINE_PARTITION_ROWS", 100_000))
+
+def list_partitions(path):
+    """Lists the (file, row group) partitions of a Parquet file or dataset directory."""
+    import pyarrow.parquet as pq
+
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".parquet"))
+    else:
+        files = [path]
+    partitions = []
+    for file_path in files:
+        num_row_groups = pq.ParquetFile(file_path).num_row_groups
+        partitions.extend((file_path, row_group) for row_group in range(num_row_groups))
+    return partitions
+
+def read_partition(partition, columns=None):
+    """Reads a single row group of a Parquet file into a DataFrame."""
+    import pyarrow.parquet as pq
+
+    file_path, row_group = partition
+    return pq.ParquetFile(file_path).read_row_group(row_group, columns=columns).to_pandas()
+
+def run_partitioned(func, partitions, n_workers=N_WORKERS, **kwargs):
+    """Maps `func(partition, **kwargs)` over partitions with a process pool, preserving order."""
+    task = functools.partial(func, **kwargs)
+    if n_workers <= 1 or len(partitions) <= 1:
+        return [task(partition) for partition in partitions]
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(partitions))) as executor:
+        return list(executor.map(task, partitions))
+
+def reset_output(path):
+    """Removes a previous output file or dataset directory before it is rewritten."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+def write_partition(df, output_dir, index):
+    """Writes one output partition as `part-XXXXX.parquet` so readers keep partition order."""
+    os.makedirs(output_dir, exist_ok=True)
+    part_path = os.path.join(output_dir, f"part-{index:05d}.parquet")
+    df.to_parquet(part_path, index=False)
+    return part_path
@@ -0,0 +1,124 @@
+import os
+import sys
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# ✅ Define Paths
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPTS_DIR)
+
+# Exit code a gate stage uses to skip its downstream stages (not a failure)
+SKIP_EXIT_CODE = 3
+
+# ✅ Pipeline Stages: each stage declares its entry point (`module:function` inside this package,
+# imported only when the stage runs) and the data artifacts it reads and writes; dependencies
+# are derived from those, so independent branches run concurrently.
+STAGES = {
+    "ingest_data": {"entry": "ingest_data:main", "inputs": [], "outputs": ["ingested_csv"]},
+    "store_parquet": {"entry": "store_parquet:main", "inputs": ["ingested_csv"], "outputs": ["raw_parquet"]},
+    "validate_data": {"entry": "data_validation:main", "inputs": ["raw_parquet"], "outputs": ["quality_gate"]},
+    "event_features": {"entry": "event_features:main", "inputs": [], "outputs": ["event_features"]},
+    "prepare_data": {"entry": "data_preparation:main", "inputs": ["raw_parquet", "event_features"], "outputs": ["prepared_parquet"]},
+    "generate_visualizations": {
+        "entry": "data_preparation:visualize",
+        "inputs": ["prepared_parquet"], "outputs": ["visualizations"],
+    },
+    "transform_data": {"entry": "data_transform:main", "inputs": ["prepared_parquet"], "outputs": ["transformed_parquet"]},
+    "feature_store_creation": {
+        "entry": "feature_store:main",
+        "inputs": ["transformed_parquet", "quality_gate"], "outputs": ["feature_store"],
+    },
+    "feature_retreival_storage": {"entry": "feature_retreival_storage:main", "inputs": ["feature_store"], "outputs": ["features"]},
+    "data_versioning": {
+        "entry": "data_versioning:main",
+        "inputs": ["raw_parquet", "prepared_parquet", "transformed_parquet", "features"], "outputs": ["data_versions"],
+    },
+    "drift_check": {"entry": "drift_detection:main", "inputs": ["features"], "outputs": ["retrain_decision"], "gate": True},
+    "data_modeling": {"entry": "data_modeling:main", "inputs": ["features", "retrain_decision"], "outputs": ["models"]},
+}
+
+def artifact_producers(stages=STAGES):
+    """Maps every artifact to the single stage that writes it."""
+    producers = {}
+    for name, stage in stages.items():
+        for artifact in stage["outputs"]:
+            if artifact in producers:
+                raise ValueError(f"❌ Artifact '{artifact}' is written by both {producers[artifact]} and {name}.")
+            producers[artifact] = name
+    return producers
+
+def stage_dependencies(stages=STAGES):
+    """Upstream stages of every stage, derived from declared inputs/outputs (validated acyclic)."""
+    producers = artifact_producers(stages)
+    dependencies = {}
+    for name, stage in stages.items():
+        missing = [artifact for artifact in stage["inputs"] if artifact not in producers]
+        if missing:
+            raise ValueError(f"❌ Stage {name} reads artifacts nobody writes: {missing}")
+        dependencies[name] = sorted({producers[artifact] for artifact in stage["inputs"]})
+
+    visited, in_progress = set(), set()
+    def visit(name):
+        if name in in_progress:
+            raise ValueError(f"❌ Dependency cycle through stage {name}.")
+        if name not in visited:
+            in_progress.add(name)
+            for upstream in dependencies[name]:
+                visit(upstream)
+            in_progress.discard(name)
+            visited.add(name)
+    for name in stages:
+        visit(name)
+    return dependencies
+
+def stage_command(name, python=sys.executable):
+    """Command line that runs a stage through the package CLI (from PROJECT_DIR)."""
+    return [python, "-m", __package__, name]
+
+def run_stage(name, stage):
+    """Runs one stage; returns 'success', 'failed' or 'gate_closed'."""
+    logging.info(f"🚀 Starting stage {name}")
+    result = subprocess.run(stage_command(name), cwd=PROJECT_DIR, capture_output=True, text=True)
+    logging.info(result.stdout)
+    print(result.stdout)
+    if result.returncode == 0:
+        return "success"
+    if stage.get("gate") and result.returncode == SKIP_EXIT_CODE:
+        logging.info(f"✅ Gate {name} closed: downstream stages skipped.")
+        return "gate_closed"
+    logging.error(result.stderr)
+    print(result.stderr)
+    return "failed"
+
+def run_pipeline(stages=STAGES, max_workers=None):
+    """Local runner: starts every stage as soon as its upstream stages succeeded."""
+    dependencies = stage_dependencies(stages)
+    status, running = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages)) as executor:
+        while len(status) < len(stages):
+            for name in stages:
+                if name in status or name in running.values():
+                    continue
+                upstream = [status.get(dependency) for dependency in dependencies[name]]
+                if any(state in ("failed", "upstream_failed") for state in upstream):
+                    status[name] = "upstream_failed"
+                elif any(state in ("gate_closed", "skipped") for state in upstream):
+                    status[name] = "skipped"
+                elif all(state == "success" for state in upstream):
+                    running[executor.submit(run_stage, name, stages[name])] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                status[running.pop(future)] = future.result()
+    for name, state in status.items():
+        print(f"{name}: {state}")
+    return status
+
+def main():
+    final_status = run_pipeline()
+    return 1 if any(state in ("failed", "upstream_failed") for state in final_status.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
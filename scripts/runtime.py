@@ -0,0 +1,56 @@
+import os
+import json
+import logging
+import tempfile
+
+# ✅ Define Paths
+LOG_DIR = "logs"
+FEATURES_DIR = "data/features/"  # Feature snapshots written by feature retrieval
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+def setup_logging(log_file):
+    """Routes the root logger to logs/<log_file>; called by stage entry points, never at import time."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    logging.basicConfig(filename=os.path.join(LOG_DIR, log_file), level=logging.INFO, format=LOG_FORMAT)
+
+def write_atomic(path, write, binary=False):
+    """Writes a file through `write(f)` into a temporary file in the same folder, fsyncs it and renames
+    it over `path`, so readers (also on other nodes) never see a partial file and a crash keeps the old one."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb" if binary else "w") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def write_json_atomic(path, payload, **dump_options):
+    """`write_atomic` for JSON documents (`dump_options` go to `json.dump`)."""
+    write_atomic(path, lambda f: json.dump(payload, f, **dump_options))
+
+def get_latest_feature_file(features_dir=FEATURES_DIR):
+    """Finds the latest feature dataset."""
+    feature_files = sorted(os.listdir(features_dir), reverse=True)
+    for file in feature_files:
+        if file.endswith(".parquet"):
+            return os.path.join(features_dir, file)
+    raise FileNotFoundError("❌ No feature files found.")
+
+def load_features(features_dir=FEATURES_DIR):
+    """Loads the latest feature file."""
+    import pandas as pd
+
+    latest_feature_file = get_latest_feature_file(features_dir)
+    logging.info(f"✅ Loading latest feature file: {latest_feature_file}")
+    print(f"✅ Loading latest feature file: {latest_feature_file}")
+    return pd.read_parquet(latest_feature_file)
+
+def ensure_dirs(*paths):
+    """Creates output folders a stage writes to."""
+    for path in paths:
+        os.makedirs(path, exist_ok=True)
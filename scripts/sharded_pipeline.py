@@ -0,0 +1,264 @@
+import os
+import sys
+import json
+import time
+import pickle
+import shutil
+import logging
+import traceback
+import subprocess
+from datetime import datetime
+import pandas as pd
+from .partitioning import list_partitions, read_partition
+from .runtime import setup_logging, write_atomic
+
+# ✅ Define Paths (SHARD_ROOT must be on a filesystem shared by every node)
+SHARD_ROOT = os.environ.get("PIPELINE_SHARD_ROOT", "data/sharded/")
+SHARD_FEATURE_STORE = os.environ.get("PIPELINE_SHARD_FEATURE_STORE")  # Offline store every node can reach
+PLAN_FILE = "_plan.json"
+ABORT_MARKER = "_ABORT"
+
+# ✅ Sharding Settings
+N_SHARDS = int(os.environ.get("PIPELINE_SHARDS", 4))
+SHARD_KEY = "customerID"
+SHARD_STAGES = ["split", "prep_stats", "prepare", "transform_stats", "transform", "features", "score"]
+POLL_SECONDS = 0.5
+TIMEOUT_SECONDS = int(os.environ.get("PIPELINE_SHARD_TIMEOUT", 3600))
+
+# Sharded layout under SHARD_ROOT:
+#   _plan.json                      run plan (source, shard count, stages) written by the coordinator
+#   <stage>/_READY                  coordinator: inputs of the stage (merged statistics) are in place
+#   <stage>/_SUCCESS-<shard>        worker: the shard finished the stage (_FAILED-<shard> holds a traceback)
+#   <stage>/shard=<k>/...           per-shard outputs (split parts, pickled statistics, Parquet parts)
+#   <stage>/merged.pkl              global statistics merged by the coordinator
+#   feature_store/                  offline feature store of external runs (unless PIPELINE_SHARD_FEATURE_STORE is set)
+
+def shard_of(keys, n_shards):
+    """Stable shard number per key (seeded SipHash of the string key, identical on every node)."""
+    return (pd.util.hash_pandas_object(keys.astype(str), index=False).to_numpy() % n_shards).astype(int)
+
+def _stage_dir(root, stage):
+    return os.path.join(root, stage)
+
+def _shard_dir(root, stage, shard):
+    return os.path.join(root, stage, f"shard={shard}")
+
+def _marker(root, stage, name):
+    return os.path.join(root, stage, name)
+
+def _touch(path, content=""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+def _dump(obj, path):
+    write_atomic(path, lambda f: pickle.dump(obj, f), binary=True)
+
+def _load(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def _read_shard(root, stage, shard):
+    return pd.read_parquet(_shard_dir(root, stage, shard))
+
+def _write_shard(df, root, stage, shard, name="part-00000.parquet"):
+    os.makedirs(_shard_dir(root, stage, shard), exist_ok=True)
+    df.to_parquet(os.path.join(_shard_dir(root, stage, shard), name), index=False)
+
+def load_plan(root=SHARD_ROOT):
+    with open(os.path.join(root, PLAN_FILE)) as f:
+        return json.load(f)
+
+# ✅ Shard Workers (one function per stage; each reads only its own shard plus merged statistics)
+def split_shard(root, shard, plan):
+    """Worker `shard` hash-partitions every n-th source row group by customer into all shards."""
+    n_shards = plan["n_shards"]
+    for index, partition in enumerate(list_partitions(plan["source"])[shard::n_shards]):
+        df = read_partition(partition)
+        if SHARD_KEY not in df.columns:
+            raise ValueError(f"❌ Sharding needs a '{SHARD_KEY}' column in {partition[0]}")
+        shards = shard_of(df[SHARD_KEY], n_shards)
+        for target in range(n_shards):
+            _write_shard(df[shards == target], root, "split", target, f"part-{shard:05d}-{index:05d}.parquet")
+
+def prep_stats_shard(root, shard, plan):
+    from .data_preparation import compute_partial_stats, normalize_columns
+
+    df = normalize_columns(_read_shard(root, "split", shard))
+    _dump(compute_partial_stats(df), os.path.join(_shard_dir(root, "prep_stats", shard), "partial.pkl"))
+
+def prepare_shard(root, shard, plan):
+    """Prepares one shard with the global statistics; SMOTE runs per shard (see `run_sharded`)."""
+    from .data_preparation import apply_preparation, apply_smote, normalize_columns
+
+    df = apply_preparation(normalize_columns(_read_shard(root, "split", shard)), _load(_marker(root, "prep_stats", "merged.pkl")))
+    _write_shard(apply_smote(df, synthetic_prefix=f"synthetic-{shard}"), root, "prepare", shard)
+
+def transform_stats_shard(root, shard, plan):
+    from .data_transform import compute_partial_ranges, engineer_features
+
+    df = engineer_features(_read_shard(root, "prepare", shard))
+    _dump(compute_partial_ranges(df), os.path.join(_shard_dir(root, "transform_stats", shard), "partial.pkl"))
+
+def transform_shard(root, shard, plan):
+    from .data_transform import engineer_features, scale_features
+
+    df = engineer_features(_read_shard(root, "prepare", shard))
+    _write_shard(scale_features(df, _load(_marker(root, "transform_stats", "merged.pkl"))), root, "transform", shard)
+
+def features_shard(root, shard, plan):
+    """Writes the shard as one part of the feature version the coordinator opened."""
+    from .feature_store import entity_ids, feature_columns
+    from .offline_feature_store import write_part
+
+    df = _read_shard(root, "transform", shard)
+    features = df[feature_columns(df)]
+    features.insert(0, "EntityID", entity_ids(df).to_numpy())
+    with open(_marker(root, "features", "version.json")) as f:
+        write_part(features, json.load(f)["version"], shard, root=plan["feature_store_root"])
+
+def score_shard(root, shard, plan):
+    """Batch-scores the shard with the production Random Forest (resumable)."""
+    from .forest_inference import score_dataset
+
+    score_dataset(_shard_dir(root, "transform", shard), _shard_dir(root, "score", shard))
+
+SHARD_FUNCTIONS = {
+    "split": split_shard,
+    "prep_stats": prep_stats_shard,
+    "prepare": prepare_shard,
+    "transform_stats": transform_stats_shard,
+    "transform": transform_shard,
+    "features": features_shard,
+    "score": score_shard,
+}
+
+def _wait_for(path, root, timeout=TIMEOUT_SECONDS):
+    """Polls the shared filesystem for a marker; fails fast when the run was aborted."""
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if os.path.exists(os.path.join(root, ABORT_MARKER)):
+            raise RuntimeError("❌ Sharded run aborted by the coordinator.")
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"❌ Timed out waiting for {path}")
+        time.sleep(POLL_SECONDS)
+
+def run_worker(shard, root=SHARD_ROOT):
+    """Shard worker (one per shard, on any node): runs every planned stage once the coordinator marks it ready."""
+    _wait_for(os.path.join(root, PLAN_FILE), root)
+    plan = load_plan(root)
+    for stage in plan["stages"]:
+        _wait_for(_marker(root, stage, "_READY"), root)
+        started = time.perf_counter()
+        try:
+            SHARD_FUNCTIONS[stage](root, shard, plan)
+        except Exception:
+            _touch(_marker(root, stage, f"_FAILED-{shard}"), traceback.format_exc())
+            raise
+        _touch(_marker(root, stage, f"_SUCCESS-{shard}"))
+        logging.info(f"✅ Shard {shard}: {stage} done in {time.perf_counter() - started:.1f}s")
+
+# ✅ Coordinator
+def _wait_for_shards(root, stage, n_shards, processes):
+    """Waits until every shard reported success; aborts the run when a shard (or a local worker) failed."""
+    deadline = time.monotonic() + TIMEOUT_SECONDS
+    pending = set(range(n_shards))
+    while pending:
+        pending = {shard for shard in pending if not os.path.exists(_marker(root, stage, f"_SUCCESS-{shard}"))}
+        failed = [shard for shard in range(n_shards) if os.path.exists(_marker(root, stage, f"_FAILED-{shard}"))]
+        crashed = [shard for shard, process in processes.items() if process.poll() not in (None, 0)]
+        if failed or crashed or time.monotonic() > deadline:
+            _touch(os.path.join(root, ABORT_MARKER))
+            for shard in failed:
+                with open(_marker(root, stage, f"_FAILED-{shard}")) as f:
+                    logging.error(f"❌ Shard {shard} failed in {stage}:\n{f.read()}")
+            raise RuntimeError(f"❌ Stage {stage} failed (failed shards: {sorted(set(failed + crashed))}, pending: {sorted(pending)}).")
+        if pending:
+            time.sleep(POLL_SECONDS)
+
+def _merge_partials(root, stage, n_shards, merge):
+    partials = [_load(os.path.join(_shard_dir(root, stage, shard), "partial.pkl")) for shard in range(n_shards)]
+    _dump(merge(partials), _marker(root, stage, "merged.pkl"))
+
+def reset_root(root):
+    """Prepares the shared root: removes only what a previous run wrote there (stage folders and
+    markers) and refuses a non-empty folder that is not a shard root."""
+    if os.path.isdir(root) and os.listdir(root):
+        if not os.path.exists(os.path.join(root, PLAN_FILE)):
+            raise ValueError(f"❌ {root} is not empty and holds no {PLAN_FILE}; refusing to use it as shard root.")
+        for stage in SHARD_STAGES:
+            if os.path.exists(_stage_dir(root, stage)):
+                shutil.rmtree(_stage_dir(root, stage))
+        for marker in (PLAN_FILE, ABORT_MARKER):
+            if os.path.exists(os.path.join(root, marker)):
+                os.remove(os.path.join(root, marker))
+    os.makedirs(root, exist_ok=True)
+
+def run_sharded(source_path=None, root=SHARD_ROOT, n_shards=N_SHARDS, launch="local", score=True, feature_store=SHARD_FEATURE_STORE):
+    """Coordinates a sharded run: shards are independent workers synchronised through markers on `root`.
+
+    With launch="local", one worker process per shard stands in for a node; with launch="external",
+    start `python -m scripts shard_worker <shard> --root <root>` on the nodes once the plan is written.
+    Global statistics (imputation/encoding sketches, scaling ranges) are merged here between stages,
+    so prepared and transformed values match a single-machine run (the encoding vocabularies are
+    persisted for scoring the same way). SMOTE is the exception: it
+    oversamples within each shard (synthetic rows interpolate between customers of the same shard),
+    so the resampled row count and synthetic rows differ slightly from a global SMOTE.
+
+    Workers and the coordinator use the feature store root recorded in the plan: `feature_store`,
+    else the project's offline store for local runs and `<root>/feature_store` for external ones."""
+    from .data_preparation import attach_encoder, get_latest_parquet, merge_stats
+    from .data_transform import merge_ranges
+    from .feature_store import RETENTION_VERSIONS
+    from . import offline_feature_store
+
+    reset_root(root)
+    stages = SHARD_STAGES if score else [stage for stage in SHARD_STAGES if stage != "score"]
+    if feature_store is None:
+        feature_store = offline_feature_store.OFFLINE_STORE_DIR if launch == "local" else os.path.join(root, "feature_store")
+    plan = {
+        "source": source_path or get_latest_parquet(),
+        "n_shards": n_shards,
+        "stages": stages,
+        "feature_store_root": feature_store,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(root, PLAN_FILE), "w") as f:
+        json.dump(plan, f, indent=2)
+
+    processes = {}
+    if launch == "local":
+        processes = {
+            shard: subprocess.Popen([sys.executable, "-m", __package__, "shard_worker", str(shard), "--root", root])
+            for shard in range(n_shards)
+        }
+    try:
+        for stage in stages:
+            started = time.perf_counter()
+            if stage == "features":
+                version = offline_feature_store.begin_version(feature_store)
+                _touch(_marker(root, stage, "version.json"), json.dumps({"version": version}))
+            _touch(_marker(root, stage, "_READY"))
+            _wait_for_shards(root, stage, n_shards, processes)
+            if stage == "prep_stats":
+                _merge_partials(root, stage, n_shards, lambda partials: attach_encoder(merge_stats(partials)))
+            elif stage == "transform_stats":
+                _merge_partials(root, stage, n_shards, merge_ranges)
+            elif stage == "features":
+                offline_feature_store.commit_version(version, feature_store, keep_versions=RETENTION_VERSIONS)
+            logging.info(f"✅ Stage {stage} finished on {n_shards} shards in {time.perf_counter() - started:.1f}s")
+            print(f"✅ Stage {stage} finished on {n_shards} shards in {time.perf_counter() - started:.1f}s")
+    finally:
+        for process in processes.values():
+            if process.poll() is None and os.path.exists(os.path.join(root, ABORT_MARKER)):
+                process.terminate()
+            process.wait()
+    return plan
+
+def main(shards=N_SHARDS, root=SHARD_ROOT, launch="local", score=True, feature_store=SHARD_FEATURE_STORE):
+    setup_logging("sharded_pipeline.log")
+    run_sharded(root=root, n_shards=shards, launch=launch, score=score, feature_store=feature_store)
+
+def worker_main(shard, root=SHARD_ROOT):
+    setup_logging(f"shard_worker_{shard}.log")
+    run_worker(shard, root)
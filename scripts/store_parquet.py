@@ -2,13 +2,8 @@ import os
 import pandas as pd
 import logging
 from datetime import datetime
- 
-# Configure logging
-logging.basicConfig(
-    filename="logs/storage.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+from .partitioning import PARTITION_ROWS
+from .runtime import setup_logging
  
 # Define storage paths
 RAW_CSV_PATH = "data/processed/customer_churn_cleaned.csv"  # Input CSV file
@@ -20,7 +15,6 @@ OUTPUT_FILE = f"{TIMESTAMP_DIR}customer_churn_raw_{timestamp}.parquet"  # Update
 def create_directories():
     """Ensure necessary directories exist."""
     os.makedirs(TIMESTAMP_DIR, exist_ok=True)
-    os.makedirs("logs", exist_ok=True)
  
 def convert_to_parquet():
     """Reads the ingested CSV file, selects first 20k rows, and saves as Parquet."""
@@ -39,7 +33,7 @@ def convert_to_parquet():
         df = df.head(20000)
  
         logging.info(f"✅ Successfully read {len(df)} records from {RAW_CSV_PATH}")
-        df.to_parquet(OUTPUT_FILE, index=False, engine="pyarrow")
+        df.to_parquet(OUTPUT_FILE, index=False, engine="pyarrow", row_group_size=PARTITION_ROWS)  # Row groups = parallel partitions
         logging.info(f"📂 First 20k records stored as Parquet: {OUTPUT_FILE}")
         print(f"✅ First 20k records stored as Parquet at: {OUTPUT_FILE}")
  
@@ -48,5 +42,9 @@ def convert_to_parquet():
         print(f"❌ Error converting to Parquet: {e}")
         raise
  
+def main():
+    setup_logging("storage.log")
+    convert_to_parquet()
+
 if __name__ == "__main__":
-    convert_to_parquet()
\ No newline at end of file
+    main()
@@ -0,0 +1,262 @@
+import os
+import numpy as np
+import pandas as pd
+
+# ✅ Default Sketch Sizes (error bounds documented on each class)
+KLL_K = 200
+# Distinct values counted exactly per column: modes and vocabularies are exact (and independent of
+# partitioning) up to this many; memory grows with it (about 16 bytes per distinct value)
+HEAVY_HITTERS_CAPACITY = int(os.environ.get("STATS_EXACT_DISTINCT_VALUES", 100_000))
+COUNT_MIN_WIDTH = 2048
+COUNT_MIN_DEPTH = 5
+
+def _as_float_array(values):
+    """Converts values to a float64 array without NaNs."""
+    values = np.asarray(values, dtype="float64")
+    return values[~np.isnan(values)]
+
+class RunningMoments:
+    """Running count/min/max/mean/variance. Merges exactly (Chan et al. parallel update)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+
+    def update(self, values):
+        """Adds a batch of values (NaNs are ignored)."""
+        values = _as_float_array(values)
+        if values.size:
+            batch = RunningMoments()
+            batch.count = values.size
+            batch.mean = values.mean()
+            batch.m2 = ((values - batch.mean) ** 2).sum()
+            batch.min = values.min()
+            batch.max = values.max()
+            self.merge(batch)
+        return self
+
+    def merge(self, other):
+        """Merges another summary into this one."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2, self.min, self.max = other.count, other.mean, other.m2, other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """Sample variance (NaN for fewer than two values)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+class KLLSketch:
+    """KLL quantile sketch. Exact until the first compaction, then rank error ~1.7/k w.h.p."""
+
+    def __init__(self, k=KLL_K, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        """Compacts over-full levels: sort, keep every other item (random offset), promote it with double weight."""
+        while any(items.size > self._capacity(level) for level, items in enumerate(self.levels)):
+            for level in range(len(self.levels)):
+                items = self.levels[level]
+                if items.size <= self._capacity(level):
+                    continue
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                leftover = items[-1:] if items.size % 2 else items[:0]
+                promoted = items[: items.size - leftover.size][self._rng.integers(2)::2]
+                self.levels[level] = leftover
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def update(self, values):
+        """Adds a batch of values (NaNs are ignored)."""
+        values = _as_float_array(values)
+        if values.size:
+            self.n += values.size
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """Merges another sketch (same k) into this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    @property
+    def is_exact(self):
+        """True while no compaction has happened."""
+        return len(self.levels) == 1
+
+    def quantile(self, q):
+        """Returns the q-quantile (linear interpolation while exact, like pandas)."""
+        if self.n == 0:
+            return np.nan
+        if self.is_exact:
+            return float(np.quantile(self.levels[0], q))
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(items_at.size, 2 ** level) for level, items_at in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        index = min(np.searchsorted(cumulative, q * cumulative[-1]), items.size - 1)
+        return float(items[order][index])
+
+class HeavyHitters:
+    """Misra-Gries heavy hitters fed with value counts. Exact while distinct values <= capacity,
+    otherwise every stored count undercounts by at most `error` <= n / (capacity + 1)."""
+
+    def __init__(self, capacity=HEAVY_HITTERS_CAPACITY):
+        self.capacity = capacity
+        self.n = 0
+        self.error = 0
+        self.counts = pd.Series(dtype="int64")
+
+    def update_counts(self, counts):
+        """Adds a `value_counts()` Series (value → count)."""
+        if len(counts) == 0:
+            return self
+        self.n += int(counts.sum())
+        parts = [part for part in (self.counts, counts) if len(part)]
+        self.counts = pd.concat(parts).groupby(level=0, sort=True).sum()
+        if len(self.counts) > self.capacity:
+            ordered = self.counts.sort_values(ascending=False, kind="stable")
+            threshold = int(ordered.iloc[self.capacity])
+            kept = ordered.iloc[: self.capacity] - threshold
+            self.counts = kept[kept > 0].sort_index()
+            self.error += threshold
+        return self
+
+    def merge(self, other):
+        """Merges another summary into this one."""
+        self.error += other.error
+        n = self.n + other.n
+        self.update_counts(other.counts)
+        self.n = n
+        return self
+
+    @property
+    def is_exact(self):
+        """True while no counts were discarded."""
+        return self.error == 0
+
+class CountMinSketch:
+    """Count-min sketch. Estimates overcount by at most e * n / width with probability 1 - exp(-depth)."""
+
+    def __init__(self, width=COUNT_MIN_WIDTH, depth=COUNT_MIN_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype="int64")
+
+    def _buckets(self, values):
+        values = np.asarray(values, dtype=object)
+        return [(pd.util.hash_array(values, hash_key=f"countmin{row:08d}") % self.width).astype(np.intp) for row in range(self.depth)]
+
+    def update_counts(self, values, counts):
+        """Adds `counts[i]` occurrences of `values[i]`."""
+        counts = np.asarray(counts, dtype="int64")
+        for row, buckets in enumerate(self._buckets(values)):
+            self.table[row] += np.bincount(buckets, weights=counts, minlength=self.width).astype("int64")
+        return self
+
+    def merge(self, other):
+        """Merges another sketch (same width/depth) into this one."""
+        self.table += other.table
+        return self
+
+    def estimate(self, values):
+        """Estimated counts for `values` (never below the true count)."""
+        return np.min([self.table[row][buckets] for row, buckets in enumerate(self._buckets(values))], axis=0)
+
+class ColumnSummary:
+    """Mergeable one-pass column summary: mode via heavy hitters + count-min, and for numeric
+    columns median/quantiles via KLL and min/max/mean/variance via running moments."""
+
+    def __init__(self, numeric):
+        self.numeric = numeric
+        self.frequencies = HeavyHitters()
+        self.count_min = CountMinSketch()
+        self.quantiles = KLLSketch() if numeric else None
+        self.moments = RunningMoments() if numeric else None
+
+    @classmethod
+    def from_series(cls, series):
+        """Summarizes a pandas Series in a single pass."""
+        return cls(numeric=pd.api.types.is_numeric_dtype(series)).update(series)
+
+    def _hash_keys(self, index):
+        # Hash numeric keys as floats so int and float partitions of one column agree
+        return index.astype("float64") if self.numeric else index
+
+    def update(self, series):
+        """Adds a batch of values."""
+        counts = series.value_counts()
+        self.frequencies.update_counts(counts)
+        self.count_min.update_counts(self._hash_keys(counts.index), counts.to_numpy())
+        if self.numeric:
+            values = series.to_numpy(dtype="float64", na_value=np.nan)
+            self.quantiles.update(values)
+            self.moments.update(values)
+        return self
+
+    def merge(self, other):
+        """Merges another summary of the same column into this one."""
+        self.frequencies.merge(other.frequencies)
+        self.count_min.merge(other.count_min)
+        if other.numeric:
+            if not self.numeric:
+                self.numeric, self.quantiles, self.moments = True, KLLSketch(), RunningMoments()
+            self.quantiles.merge(other.quantiles)
+            self.moments.merge(other.moments)
+        return self
+
+    def mode(self):
+        """Most frequent value, smallest on ties (same as `df.mode().iloc[0]` while exact).
+
+        Past the exact capacity, numeric columns (mostly continuous, where count-min error exceeds
+        the top counts) fall back to the median; categorical columns use count-min estimates."""
+        counts = self.frequencies.counts
+        if counts.empty:
+            return np.nan
+        if self.frequencies.is_exact:
+            scores = counts.to_numpy()
+        elif self.numeric:
+            return self.median()
+        else:
+            scores = self.count_min.estimate(self._hash_keys(counts.index))
+        return counts.index[scores == scores.max()][0]
+
+    def median(self):
+        """Median (exact while the KLL sketch has not compacted)."""
+        return self.quantiles.quantile(0.5) if self.numeric else np.nan
+
+    def vocabulary(self):
+        """Sorted distinct values; only available while the frequency summary is exact."""
+        if not self.frequencies.is_exact:
+            raise ValueError(
+                f"❌ Column has more than {self.frequencies.capacity} distinct values; no exact vocabulary "
+                "(raise STATS_EXACT_DISTINCT_VALUES)."
+            )
+        return self.frequencies.counts.index.tolist()